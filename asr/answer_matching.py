@@ -0,0 +1,170 @@
+"""
+Match transcripts against a question's ranked correct answers.
+
+The similarity rule mirrors ranking-logic's ``SimilarityCalculator``:
+lower-case and strip both texts, then ``1 - levenshtein / max(len)``, with a
+default threshold of 0.75 (``Defaults.SIMILARITY_THRESHOLD``). Final
+questions are fetched from the backend's ``/api/v1/admin/survey/final``
+endpoint, indexed by question id and refreshed in the background, so scoring
+a transcript never leaves the process.
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger("asr.answers")
+
+FINAL_QUESTIONS_PATH = "/api/v1/admin/survey/final"
+
+
+def normalize(text):
+    return (text or "").lower().strip()
+
+
+def similarity(text1, text2):
+    if not text1 or not text2:
+        return 0.0
+    s1, s2 = normalize(text1), normalize(text2)
+    if s1 == s2:
+        return 1.0
+    if not s1 or not s2:
+        return 0.0
+
+    # Two-row Levenshtein; same distance as ranking-logic's full matrix
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != c2)))
+        previous = current
+    return max(0.0, 1 - previous[-1] / max(len(s1), len(s2)))
+
+
+class AnswerIndex:
+    """Ranked correct answers per question id, normalized once at build time."""
+
+    def __init__(self, questions, threshold=0.75):
+        self.threshold = threshold
+        self.questions = {}
+        for question in questions:
+            answers = [
+                {
+                    "answer": answer.get("answer", ""),
+                    "normalized": normalize(answer.get("answer", "")),
+                    "rank": answer.get("rank", 0),
+                    "score": answer.get("score", 0),
+                }
+                for answer in question.get("answers", [])
+                if answer.get("isCorrect") and answer.get("rank", 0) > 0
+            ]
+            for key in (question.get("_id"), question.get("questionID")):
+                if key:
+                    self.questions[str(key)] = {"question": question.get("question", ""), "answers": answers}
+
+    def __contains__(self, question_id):
+        return str(question_id) in self.questions
+
+    def __len__(self):
+        return len(self.questions)
+
+    def match(self, question_id, transcript):
+        entry = self.questions[str(question_id)]
+        text = normalize(transcript)
+        best = None
+        for answer in entry["answers"]:
+            value = 1.0 if text == answer["normalized"] else similarity(text, answer["normalized"])
+            # Ties go to the better-scoring answer
+            if best is None or (value, answer["score"]) > (best[0], best[1]["score"]):
+                best = (value, answer)
+
+        if best is None or best[0] < self.threshold:
+            return {
+                "matched": False,
+                "rank": 0,
+                "score": 0,
+                "answer": best[1]["answer"] if best else None,
+                "similarity": round(best[0], 4) if best else 0.0,
+            }
+        return {
+            "matched": True,
+            "rank": best[1]["rank"],
+            "score": best[1]["score"],
+            "answer": best[1]["answer"],
+            "similarity": round(best[0], 4),
+        }
+
+
+class AnswerStore:
+    """Keeps an AnswerIndex loaded from the backend and swaps in a fresh one every ``refresh_seconds``."""
+
+    def __init__(self, api_url, api_key=None, refresh_seconds=300, threshold=0.75, timeout=30):
+        self.api_url = api_url.rstrip("/") if api_url else None
+        self.api_key = api_key
+        self.refresh_seconds = refresh_seconds
+        self.threshold = threshold
+        self.timeout = timeout
+        self.index = None
+        self.loaded_at = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.api_url)
+
+    def start(self):
+        """Load now and keep refreshing in the background; started per process after any fork."""
+        if not self.enabled:
+            return self
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._thread = threading.Thread(target=self._refresh_loop, name="asr-answer-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def refresh(self):
+        start = time.perf_counter()
+        request = urllib.request.Request(self.api_url + FINAL_QUESTIONS_PATH)
+        if self.api_key:
+            request.add_header("x-api-key", self.api_key)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+            # The backend answers 404 when nothing has been finalized yet
+            payload = {"data": []}
+
+        questions = payload.get("data", []) if isinstance(payload, dict) else payload
+        self.index = AnswerIndex(questions if isinstance(questions, list) else [questions], self.threshold)
+        self.loaded_at = time.time()
+        self.error = None
+        logger.info("Loaded %d final questions in %.3fs", len(self.index), time.perf_counter() - start)
+        return self.index
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "questions": len(self.index) if self.index is not None else 0,
+            "loaded_at": self.loaded_at,
+            "refresh_seconds": self.refresh_seconds,
+            "threshold": self.threshold,
+            "error": self.error,
+        }
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous index if there is one
+                self.error = str(e)
+                logger.error("Failed to load final questions: %s", e)
+            time.sleep(self.refresh_seconds if self.index is not None else min(30, self.refresh_seconds))
@@ -1,50 +1,246 @@
-import torch
 import gradio as gr
-import nemo.collections.asr as nemo_asr
+import logging
+import numpy as np
 import os
-import librosa
 import soundfile as sf
 import tempfile
+import threading
+import time
+import uvicorn
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-asr_model = nemo_asr.models.EncDecCTCModel.restore_from("sanskrit.nemo")
-asr_model.eval()
-asr_model = asr_model.to(device)
-asr_model.cur_decoder = "ctc"
-
-def preprocess_audio(audio_file, target_sr=16000):
-    try:
-        audio, sr = librosa.load(audio_file, sr=target_sr)
-        
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        sf.write(temp_file.name, audio, target_sr)
-        temp_file.close()
-        
-        return temp_file.name
-    except Exception as e:
-        print(f"Error in preprocessing: {e}")
-        return audio_file
+import metrics
+from answer_matching import AnswerStore
+from batching import BatchingQueue, DeadlineExceeded, QueueFull
+from metrics import RequestTrace
+from model_loader import ModelManager, ModelNotReady
+from resampling import decode_resampled, get_resampler
+from streaming import StreamingSession
+from transcription_cache import TranscriptionCache
+from vad import trim_silence
+
+MODEL_PATH = os.getenv("ASR_MODEL_PATH", "sanskrit.nemo")
+TARGET_SR = 16000
+READY_TIMEOUT = float(os.getenv("ASR_READY_TIMEOUT", "120"))
+VAD_ENABLED = os.getenv("ASR_VAD_ENABLED", "true").lower() == "true"
+VAD_THRESHOLD_DB = float(os.getenv("ASR_VAD_THRESHOLD_DB", "-40"))
+VAD_MAX_PAUSE_MS = int(os.getenv("ASR_VAD_MAX_PAUSE_MS", "300"))
+CHECKPOINT_CACHE_DIR = os.getenv("ASR_CHECKPOINT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "asr-checkpoints"))
+API_KEY = os.getenv("ASR_API_KEY")
+RESAMPLER = os.getenv("ASR_RESAMPLER", "polyphase")
+STREAM_PARTIAL_INTERVAL = float(os.getenv("ASR_STREAM_PARTIAL_INTERVAL", "1.0"))
+STREAM_ENDPOINT_MS = int(os.getenv("ASR_STREAM_ENDPOINT_MS", "700"))
+STREAM_WINDOW_SECONDS = float(os.getenv("ASR_STREAM_WINDOW_SECONDS", "15"))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("asr")
+metrics.configure_request_log(os.getenv("ASR_REQUEST_LOG"))
+
+model_manager = ModelManager(
+    MODEL_PATH,
+    warmup_seconds=float(os.getenv("ASR_WARMUP_SECONDS", "1.0")),
+    checkpoint_cache_dir=CHECKPOINT_CACHE_DIR or None,
+    profile=os.getenv("ASR_INFERENCE_PROFILE", "fp32"),
+    num_threads=int(os.getenv("ASR_NUM_THREADS", "0")) or None,
+    workers=int(os.getenv("ASR_WORKERS", "1")),
+    graph_path=os.getenv("ASR_GRAPH_PATH") or None,
+)
+
+batching_queue = BatchingQueue(
+    model_manager.transcribe_files,
+    max_batch_size=int(os.getenv("ASR_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("ASR_BATCH_WAIT_MS", "20")),
+    max_pending=int(os.getenv("ASR_MAX_PENDING", "32")) or None,
+    max_queue_wait_ms=float(os.getenv("ASR_MAX_QUEUE_WAIT_MS", "10000")) or None,
+    on_batch=lambda size, seconds: metrics.batch_size.observe(size, pid=os.getpid()),
+)
+
+def _per_process(value):
+    return {(("pid", os.getpid()),): value}
+
+metrics.registry.gauge("asr_model_ready", "1 once the model has loaded and warmed up",
+                       lambda: _per_process(int(model_manager.is_ready())))
+metrics.registry.gauge("asr_model_memory_bytes", "Bytes held by model parameters and buffers",
+                       lambda: _per_process(model_manager.model_memory_bytes()))
+metrics.registry.gauge("asr_process_resident_bytes", "Resident memory of this process",
+                       lambda: _per_process(metrics.resident_memory_bytes()))
+metrics.registry.gauge("asr_queue_pending", "Clips waiting in the batching queue",
+                       lambda: _per_process(batching_queue.stats()["pending"]))
+metrics.registry.gauge("asr_queue_in_flight", "Clips in the current model forward pass",
+                       lambda: _per_process(batching_queue.stats()["in_flight"]))
+
+answer_store = AnswerStore(
+    os.getenv("ASR_ANSWERS_API_URL"),
+    api_key=os.getenv("ASR_ANSWERS_API_KEY"),
+    refresh_seconds=float(os.getenv("ASR_ANSWERS_REFRESH_SECONDS", "300")),
+    threshold=float(os.getenv("ASR_MATCH_THRESHOLD", "0.75")),
+)
+
+_cache_lock = threading.Lock()
+_transcription_cache = None
+
+def get_transcription_cache():
+    global _transcription_cache
+    with _cache_lock:
+        if _transcription_cache is None:
+            # Profiles can change transcripts (int8, bf16), so they key separately
+            _transcription_cache = TranscriptionCache(
+                f"{model_manager.model_checksum}:{model_manager.profile.name}",
+                max_entries=int(os.getenv("ASR_CACHE_SIZE", "1024")),
+                disk_dir=os.getenv("ASR_CACHE_DIR") or None,
+            )
+        return _transcription_cache
+
+def decode_audio(audio_file):
+    """Mono float32 at the file's own rate; librosa covers formats libsndfile can't read."""
+    try:
+        audio, sr = sf.read(audio_file, dtype="float32", always_2d=True)
+        return audio.mean(axis=1), sr
+    except RuntimeError:
+        import librosa
+        return librosa.load(audio_file, sr=None, mono=True)
+
+def load_audio(audio_file, target_sr, trace):
+    """Decode and resample to target_sr, timing both stages on the trace."""
+    if RESAMPLER == "polyphase":
+        try:
+            timings = {}
+            audio, sr = decode_resampled(audio_file, target_sr, timings=timings)
+            for stage, seconds in timings.items():
+                trace.add(stage, seconds)
+            trace.audio_seconds = len(audio) / target_sr
+            return audio
+        except RuntimeError:
+            # Not readable by libsndfile (e.g. webm); decode in one go below
+            pass
+
+    with trace.stage("decode"):
+        audio, sr = decode_audio(audio_file)
+    trace.audio_seconds = len(audio) / sr if sr else None
+    with trace.stage("resample"):
+        return get_resampler(RESAMPLER)(audio, sr, target_sr)
+
+def preprocess_audio(audio_file, target_sr=TARGET_SR, trace=None):
+    trace = trace or RequestTrace("internal")
+    try:
+        audio = load_audio(audio_file, target_sr, trace)
+
+        vad_stats = None
+        if VAD_ENABLED:
+            with trace.stage("vad"):
+                audio, vad_stats = trim_silence(audio, target_sr, threshold_db=VAD_THRESHOLD_DB, max_pause_ms=VAD_MAX_PAUSE_MS)
+            logger.debug("VAD skipped %s/%s frames (%ss -> %ss)", vad_stats["frames_skipped"],
+                         vad_stats["frames_total"], vad_stats["seconds_in"], vad_stats["seconds_out"])
+        return audio, vad_stats
+    except Exception:
+        logger.exception("Error in preprocessing %s", audio_file)
+        return None, None
+
+def write_temp_wav(audio, sample_rate=TARGET_SR):
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+    sf.write(temp_file.name, audio, sample_rate)
+    temp_file.close()
+    return temp_file.name
+
+def admit_request(count, source):
+    """Admission check for a whole request; raises QueueFull and counts the rejection once."""
+    try:
+        batching_queue.admit(count)
+    except QueueFull:
+        metrics.requests_total.inc(count, source=source, status="rejected", pid=os.getpid())
+        raise
+
+def transcribe_audio_files(audio_files, source="api", filenames=None, admitted=False):
+    """Transcribe several files through the shared batching queue, one result dict per file.
+
+    Raises QueueFull before any preprocessing when the whole request cannot be admitted,
+    unless the caller already ran admit_request for it (admitted=True).
+    """
+    if not admitted:
+        admit_request(len(audio_files), source)
+    transcription_cache = get_transcription_cache()
+    results = [None] * len(audio_files)
+    pending = []
+
+    for i, audio_file in enumerate(audio_files):
+        trace = RequestTrace(source, filenames[i] if filenames else os.path.basename(audio_file))
+        audio, vad_stats = preprocess_audio(audio_file, trace=trace)
+
+        cache_key = None
+        processed_audio = audio_file
+        if audio is not None:
+            with trace.stage("cache"):
+                cache_key = transcription_cache.key_for(audio, TARGET_SR)
+                cached = transcription_cache.get(cache_key)
+            if cached is not None:
+                trace.cached = True
+                trace.finish()
+                results[i] = {"transcription": cached, "cached": True, "timings": trace.rounded_stages()}
+                continue
+            with trace.stage("write"):
+                processed_audio = write_temp_wav(audio)
+
+        try:
+            future = batching_queue.submit(processed_audio)
+        except QueueFull as e:
+            future = Future()
+            future.set_exception(e)
+        pending.append((i, audio_file, processed_audio, cache_key, future, trace))
+
+    for i, audio_file, processed_audio, cache_key, future, trace in pending:
+        try:
+            text = future.result()
+            if text is not None and cache_key is not None:
+                transcription_cache.put(cache_key, text)
+            results[i] = {"transcription": text, "cached": False}
+        except QueueFull as e:
+            results[i] = {"transcription": None, "cached": False, "error": str(e), "status": "rejected"}
+            trace.fail("rejected", e)
+        except DeadlineExceeded as e:
+            results[i] = {"transcription": None, "cached": False, "error": str(e), "status": "expired"}
+            trace.fail("expired", e)
+        except Exception as e:
+            logger.exception("Transcription failed for %s", audio_file)
+            results[i] = {"transcription": None, "cached": False, "error": str(e)}
+            trace.fail("error", e)
+        finally:
+            if processed_audio != audio_file and os.path.exists(processed_audio):
+                os.unlink(processed_audio)
+            if hasattr(future, "queue_wait"):
+                trace.add("queue_wait", future.queue_wait)
+                trace.add("inference", future.inference_seconds)
+            trace.finish()
+            results[i]["timings"] = trace.rounded_stages()
+
+    return results
 
 def transcribe_sanskrit(audio_file):
     if isinstance(audio_file, tuple):
         audio_file = audio_file[0]
-    
+
     if not os.path.exists(audio_file):
         return "Error: File not found."
-    
-    try:
-        processed_audio = preprocess_audio(audio_file)
-        
-        result = asr_model.transcribe([processed_audio], batch_size=1, logprobs=False, language_id="sa")
-        
-        if processed_audio != audio_file and os.path.exists(processed_audio):
-            os.unlink(processed_audio)
-        
-        return result[0][0] if result else "No transcription output."
-    
+
+    try:
+        model_manager.wait_ready(READY_TIMEOUT)
+    except ModelNotReady as e:
+        return f"Error: {str(e)}"
+
+    try:
+        result = transcribe_audio_files([audio_file], source="ui")[0]
+    except QueueFull as e:
+        return f"Error: Server is busy, please retry in {e.retry_after}s."
     except Exception as e:
         return f"Error during transcription: {str(e)}"
 
+    if "error" in result:
+        return f"Error during transcription: {result['error']}"
+    return result["transcription"] if result["transcription"] is not None else "No transcription output."
+
 interface = gr.Interface(
     fn=transcribe_sanskrit,
     inputs=gr.Audio(type="filepath", label="Upload Sanskrit Audio (.wav)"),
@@ -53,5 +249,286 @@ interface = gr.Interface(
     description="Upload a Sanskrit audio file to get its transcription using NVIDIA NeMo."
 )
 
+def failure_status(error):
+    if isinstance(error, QueueFull):
+        return "rejected"
+    if isinstance(error, DeadlineExceeded):
+        return "expired"
+    return "error"
+
+def transcribe_array(audio):
+    """Decode an in-memory 16 kHz clip through the shared batching queue."""
+    trace = RequestTrace("stream")
+    trace.audio_seconds = len(audio) / TARGET_SR
+    with trace.stage("write"):
+        path = write_temp_wav(audio)
+    future = None
+    try:
+        future = batching_queue.submit(path)
+        return future.result()
+    except Exception as e:
+        trace.fail(failure_status(e), e)
+        raise
+    finally:
+        os.unlink(path)
+        if hasattr(future, "queue_wait"):
+            trace.add("queue_wait", future.queue_wait)
+            trace.add("inference", future.inference_seconds)
+        trace.finish()
+
+def new_streaming_session():
+    return StreamingSession(
+        transcribe_array,
+        sample_rate=TARGET_SR,
+        partial_interval=STREAM_PARTIAL_INTERVAL,
+        endpoint_ms=STREAM_ENDPOINT_MS,
+        window_seconds=STREAM_WINDOW_SECONDS,
+        threshold_db=VAD_THRESHOLD_DB,
+    )
+
+def stream_sanskrit(chunk, session):
+    if chunk is None:
+        return (session.text if session else ""), session
+    if not model_manager.is_ready():
+        return "Error: ASR model is still loading, please try again shortly.", session
+
+    session = session or new_streaming_session()
+    sample_rate, data = chunk
+    try:
+        session.feed_pcm(data, sample_rate)
+    except (QueueFull, DeadlineExceeded):
+        # Skip this partial under load; the next chunk retries
+        pass
+    return session.text, session
+
+def finish_stream(session):
+    if session is None:
+        return "", None
+    try:
+        return session.finish()["text"], None
+    except Exception as e:
+        return f"Error during transcription: {str(e)}", None
+
+with gr.Blocks() as streaming_interface:
+    gr.Markdown("Speak into the microphone; the transcript updates while you talk.")
+    stream_state = gr.State()
+    microphone = gr.Audio(sources=["microphone"], type="numpy", streaming=True, label="Live Sanskrit Audio")
+    live_output = gr.Textbox(label="Transcription")
+    microphone.stream(
+        stream_sanskrit,
+        inputs=[microphone, stream_state],
+        outputs=[live_output, stream_state],
+        stream_every=0.5,
+    )
+    microphone.stop_recording(finish_stream, inputs=[stream_state], outputs=[live_output, stream_state])
+
+demo = gr.TabbedInterface([interface, streaming_interface], ["Upload", "Live"], title="Sanskrit ASR")
+
+api = FastAPI(title="Sanskrit ASR")
+
+@api.on_event("startup")
+def start_answer_store():
+    # Runs in every serving process, so the refresh thread also exists after a fork
+    answer_store.start()
+
+@api.get("/health/live")
+def health_live():
+    return {"status": "alive"}
+
+@api.get("/health/ready")
+def health_ready():
+    status = model_manager.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+async def read_uploads(request):
+    """Multipart uploads (any field name) or a single raw audio body, plus text fields.
+
+    Text fields come from the multipart form, or from the query string for raw bodies.
+    """
+    fields = dict(request.query_params)
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        uploads = []
+        for name, value in form.multi_items():
+            if hasattr(value, "read"):
+                uploads.append((value.filename or "audio", await value.read()))
+            else:
+                fields[name] = value
+        return uploads, fields
+
+    body = await request.body()
+    return ([(request.headers.get("x-filename", "audio"), body)] if body else []), fields
+
+def write_upload(filename, data):
+    suffix = os.path.splitext(filename)[1] or ".wav"
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    temp_file.write(data)
+    temp_file.close()
+    return temp_file.name
+
+def busy_response(error):
+    return JSONResponse(
+        {"error": str(error), "retry_after": error.retry_after},
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+@api.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@api.get("/api/answers")
+def answers_status():
+    return answer_store.status()
+
+@api.get("/api/queue")
+def queue_stats():
+    return batching_queue.stats()
+
+@api.post("/api/transcribe")
+async def api_transcribe(request: Request):
+    if API_KEY and request.headers.get("x-api-key") != API_KEY:
+        return JSONResponse({"error": "Unauthorized. Invalid or missing API key"}, status_code=401)
+
+    if not model_manager.is_ready():
+        return JSONResponse({"error": "ASR model is not ready", "status": model_manager.status()}, status_code=503)
+
+    uploads, _ = await read_uploads(request)
+    if not uploads:
+        return JSONResponse({"error": "No audio provided"}, status_code=400)
+
+    # Admit before writing any upload to disk; transcribe_audio_files then skips its own check
+    try:
+        admit_request(len(uploads), "api")
+    except QueueFull as e:
+        return busy_response(e)
+
+    paths = [write_upload(filename, data) for filename, data in uploads]
+    try:
+        results = await run_in_threadpool(
+            transcribe_audio_files, paths, "api", [filename for filename, _ in uploads], True
+        )
+    except QueueFull as e:
+        return busy_response(e)
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+    if all(result.get("status") == "expired" for result in results):
+        return JSONResponse({"error": "Timed out waiting in the ASR queue", "results": results}, status_code=504)
+
+    return {
+        "results": [
+            {"index": i, "filename": filename, **result}
+            for i, ((filename, _), result) in enumerate(zip(uploads, results))
+        ],
+        "count": len(results),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+@api.post("/api/score")
+async def api_score(request: Request):
+    """Transcribe one answer and score it against the question's ranked correct answers."""
+    started = time.perf_counter()
+    if API_KEY and request.headers.get("x-api-key") != API_KEY:
+        return JSONResponse({"error": "Unauthorized. Invalid or missing API key"}, status_code=401)
+    if not answer_store.enabled:
+        return JSONResponse({"error": "Answer scoring is not configured (set ASR_ANSWERS_API_URL)"}, status_code=501)
+    if not model_manager.is_ready():
+        return JSONResponse({"error": "ASR model is not ready", "status": model_manager.status()}, status_code=503)
+    index = answer_store.index
+    if index is None:
+        return JSONResponse({"error": "Answers are not loaded yet", "answers": answer_store.status()}, status_code=503)
+
+    uploads, fields = await read_uploads(request)
+    question_id = fields.get("questionId") or fields.get("questionID")
+    if not uploads or not question_id:
+        return JSONResponse({"error": "Provide one audio file and a questionId"}, status_code=400)
+    if question_id not in index:
+        return JSONResponse({"error": f"Question {question_id} not found"}, status_code=404)
+
+    try:
+        batching_queue.admit(1)
+    except QueueFull as e:
+        return busy_response(e)
+
+    filename, data = uploads[0]
+    hop = time.perf_counter()
+    path = write_upload(filename, data)
+    timings = {"upload": time.perf_counter() - started}
+    try:
+        result = (await run_in_threadpool(transcribe_audio_files, [path], "score", [filename]))[0]
+    except QueueFull as e:
+        return busy_response(e)
+    finally:
+        os.unlink(path)
+    timings["transcribe"] = time.perf_counter() - hop
+
+    if result.get("status") == "expired":
+        return JSONResponse({"error": result["error"]}, status_code=504)
+    if result.get("error"):
+        return JSONResponse({"error": f"Transcription failed: {result['error']}"}, status_code=500)
+
+    hop = time.perf_counter()
+    match = index.match(question_id, result["transcription"])
+    timings["match"] = time.perf_counter() - hop
+    timings["total"] = time.perf_counter() - started
+
+    return {
+        "questionId": question_id,
+        "transcription": result["transcription"],
+        "cached": result["cached"],
+        **match,
+        "timings": {name: round(seconds, 4) for name, seconds in timings.items()},
+        "stages": result["timings"],
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+@api.websocket("/api/stream")
+async def api_stream(websocket: WebSocket):
+    """Binary frames of 16-bit mono PCM at ?sample_rate=; send the text "end" to finish."""
+    key = websocket.headers.get("x-api-key") or websocket.query_params.get("api_key")
+    if API_KEY and key != API_KEY:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    if not model_manager.is_ready():
+        await websocket.send_json({"error": "ASR model is not ready"})
+        await websocket.close(code=1013)
+        return
+
+    sample_rate = int(websocket.query_params.get("sample_rate", TARGET_SR))
+    session = new_streaming_session()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") == "end":
+                await websocket.send_json(await run_in_threadpool(session.finish))
+                await websocket.close()
+                return
+            if message.get("bytes"):
+                pcm = np.frombuffer(message["bytes"], dtype=np.int16)
+                try:
+                    event = await run_in_threadpool(session.feed_pcm, pcm, sample_rate)
+                except QueueFull as e:
+                    event = {"text": session.text, "partial": session.partial, "final": False, "retry_after": e.retry_after}
+                except DeadlineExceeded:
+                    event = {"text": session.text, "partial": session.partial, "final": False}
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        return
+
+app = gr.mount_gradio_app(api, demo, path="/")
+
 if __name__ == "__main__":
-    interface.launch(server_name="0.0.0.0", server_port=7860)
\ No newline at end of file
+    if model_manager.workers > 1:
+        # Load once in this process, then fork workers that share the weights
+        from multiworker import serve
+        serve(app, model_manager, host="0.0.0.0", port=7860)
+    else:
+        # Bind the port right away; the model loads and warms up in the background
+        model_manager.start()
+        uvicorn.run(app, host="0.0.0.0", port=7860)
@@ -0,0 +1,189 @@
+"""
+Shared micro-batching queue in front of the ASR model.
+
+Every caller (Gradio UI, REST API) submits prepared 16 kHz wav paths here.
+One worker thread drains the queue, groups whatever arrived within
+``max_wait_ms`` (up to ``max_batch_size``) into a single ``transcribe`` call
+and resolves each caller's future with its own transcript.
+
+Admission is bounded: once ``max_pending`` jobs are waiting, new submissions
+fail fast with ``QueueFull`` (carrying a retry-after estimate), and jobs that
+sat in the queue longer than ``max_queue_wait_ms`` are dropped with
+``DeadlineExceeded`` instead of being run late.
+"""
+
+import collections
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class QueueFull(Exception):
+    def __init__(self, pending, retry_after):
+        super().__init__(f"ASR queue is full ({pending} pending), retry in {retry_after}s")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class TranscriptionJob:
+    def __init__(self, path, max_queue_wait=None):
+        self.path = path
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.deadline = self.enqueued_at + max_queue_wait if max_queue_wait else None
+
+
+class BatchingQueue:
+    def __init__(self, transcribe_fn, max_batch_size=8, max_wait_ms=20, max_pending=None, max_queue_wait_ms=None,
+                 on_batch=None):
+        self.transcribe_fn = transcribe_fn
+        self.on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.max_queue_wait = max_queue_wait_ms / 1000 if max_queue_wait_ms else None
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = 0
+        self._batch_seconds = None
+        self._waits = collections.deque(maxlen=1000)
+        self._counts = {"accepted": 0, "rejected": 0, "expired": 0, "completed": 0, "failed": 0}
+
+    def admit(self, count=1):
+        """Raise QueueFull if ``count`` more jobs would not fit right now."""
+        with self._lock:
+            self._check_capacity(count)
+
+    def submit(self, path):
+        self._ensure_worker()
+        job = TranscriptionJob(path, self.max_queue_wait)
+        with self._lock:
+            self._check_capacity(1)
+            self._pending += 1
+            self._counts["accepted"] += 1
+        self._queue.put(job)
+        return job.future
+
+    def transcribe(self, paths, timeout=None):
+        futures = [self.submit(path) for path in paths]
+        return [future.result(timeout) for future in futures]
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained."""
+        with self._lock:
+            return self._retry_after()
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "pending": self._pending,
+                "in_flight": self._in_flight,
+                "max_pending": self.max_pending,
+                "max_batch_size": self.max_batch_size,
+                "max_queue_wait_ms": self.max_queue_wait * 1000 if self.max_queue_wait else None,
+                "avg_batch_seconds": round(self._batch_seconds, 4) if self._batch_seconds is not None else None,
+                "queue_wait_ms": {
+                    "p50": _percentile_ms(waits, 0.50),
+                    "p95": _percentile_ms(waits, 0.95),
+                    "max": _percentile_ms(waits, 1.0),
+                    "samples": len(waits),
+                },
+                **self._counts,
+            }
+
+    def _check_capacity(self, count):
+        if self.max_pending is not None and self._pending + count > self.max_pending:
+            self._counts["rejected"] += count
+            raise QueueFull(self._pending, self._retry_after())
+
+    def _retry_after(self):
+        batches = math.ceil((self._pending + self._in_flight) / self.max_batch_size)
+        return max(1, math.ceil(batches * (self._batch_seconds or 1.0)))
+
+    def _ensure_worker(self):
+        # Started lazily so a forked worker process gets its own thread
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="asr-batching", daemon=True)
+                self._worker.start()
+
+    def _take(self, timeout=None):
+        """Next job that is still within its deadline; expired jobs are failed on the way."""
+        while True:
+            job = self._queue.get(timeout=timeout)
+            now = time.perf_counter()
+            with self._lock:
+                self._pending -= 1
+                if job.deadline is not None and now > job.deadline:
+                    self._counts["expired"] += 1
+                    expired = True
+                else:
+                    self._waits.append(now - job.enqueued_at)
+                    expired = False
+            if not expired:
+                return job
+            job.future.set_exception(DeadlineExceeded(
+                f"Waited {now - job.enqueued_at:.2f}s in the ASR queue (limit {self.max_queue_wait:.2f}s)"
+            ))
+
+    def _next_batch(self):
+        batch = [self._take()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._take(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            with self._lock:
+                self._in_flight = len(batch)
+            start = time.perf_counter()
+            try:
+                result = self.transcribe_fn([job.path for job in batch])
+                texts = list(result[0]) if result else []
+                outcome = "completed"
+            except Exception as e:
+                error = e
+                outcome = "failed"
+            elapsed = time.perf_counter() - start
+
+            for i, job in enumerate(batch):
+                # Read by callers that trace where their request's time went
+                job.future.queue_wait = start - job.enqueued_at
+                job.future.inference_seconds = elapsed
+                job.future.batch_size = len(batch)
+                if outcome == "completed":
+                    job.future.set_result(texts[i] if i < len(texts) else None)
+                else:
+                    job.future.set_exception(error)
+            if self.on_batch is not None:
+                self.on_batch(len(batch), elapsed)
+
+            with self._lock:
+                self._in_flight = 0
+                self._counts[outcome] += len(batch)
+                # Smoothed batch duration drives the retry-after estimate
+                self._batch_seconds = elapsed if self._batch_seconds is None else 0.8 * self._batch_seconds + 0.2 * elapsed
+
+
+def _percentile_ms(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * (len(sorted_values) - 1) + 0.5))
+    return round(sorted_values[index] * 1000, 2)
@@ -0,0 +1,216 @@
+"""
+Throughput and latency benchmark for the ASR service.
+
+    python benchmark.py --durations 1 3 5 10 --max-batch 4 --profiles fp32 int8 --output bench.json
+
+Decode, resample, temp-file write and inference are timed separately for
+every (profile, clip duration, batch size) combination. Clips are synthetic
+unless --reference-dir is given. Results are written as JSON. Peak RSS is
+process-wide, so run one profile per invocation for isolated memory numbers.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from inference_profiles import PROFILES
+from model_loader import ModelManager
+from resampling import BACKENDS as RESAMPLERS, get_resampler
+from vad import trim_silence
+
+TARGET_SR = 16000
+STAGES = ("decode", "resample", "vad", "write", "inference")
+
+
+def synthetic_clip(duration, sample_rate, seed=0):
+    """A speech-like signal: a voiced harmonic burst with silence on either side."""
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    t = np.arange(n) / sample_rate
+    f0 = 120 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(np.pi * t / max(duration, 1e-3)) * 1.5, 0, 1) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    audio = 0.2 * voiced * envelope + rng.standard_normal(n) * 0.003
+    return audio.astype(np.float32)
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(values):
+    if not values:
+        return None
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "mean": round(float(arr.mean()), 5),
+        "p50": round(float(np.percentile(arr, 50)), 5),
+        "p95": round(float(np.percentile(arr, 95)), 5),
+        "p99": round(float(np.percentile(arr, 99)), 5),
+        "min": round(float(arr.min()), 5),
+        "max": round(float(arr.max()), 5),
+        "n": len(values),
+    }
+
+
+def prepare_clips(args, workdir):
+    """Return {label: [(path, duration_seconds), ...]} grouped by clip duration."""
+    if args.reference_dir:
+        clips = {}
+        for name in sorted(os.listdir(args.reference_dir)):
+            path = os.path.join(args.reference_dir, name)
+            try:
+                info = sf.info(path)
+            except RuntimeError:
+                continue
+            clips.setdefault("reference", []).append((path, info.frames / info.samplerate))
+        if not clips:
+            raise ValueError(f"No readable audio files in {args.reference_dir}")
+        return clips
+
+    clips = {}
+    for duration in args.durations:
+        label = f"{duration:g}s"
+        for seed in range(args.max_batch):
+            path = os.path.join(workdir, f"clip_{label}_{seed}.wav")
+            sf.write(path, synthetic_clip(duration, args.source_rate, seed), args.source_rate)
+            clips.setdefault(label, []).append((path, duration))
+    return clips
+
+
+def process_clip(path, use_vad, resampler="polyphase"):
+    timings = {}
+    start = time.perf_counter()
+    audio, sample_rate = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    audio = get_resampler(resampler)(audio, sample_rate, TARGET_SR)
+    timings["resample"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if use_vad:
+        audio, _ = trim_silence(audio, TARGET_SR)
+    timings["vad"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+    sf.write(temp_file.name, audio, TARGET_SR)
+    temp_file.close()
+    timings["write"] = time.perf_counter() - start
+    return temp_file.name, timings
+
+
+def benchmark_profile(profile, clips, args):
+    manager = ModelManager(
+        args.model,
+        warmup_seconds=1.0,
+        checkpoint_cache_dir=args.checkpoint_cache_dir or None,
+        profile=profile,
+        num_threads=args.threads,
+        graph_path=args.graph,
+    )
+    manager.load()
+
+    results = []
+    for label, clip_list in clips.items():
+        for batch_size in range(1, args.max_batch + 1):
+            batch = [clip_list[i % len(clip_list)] for i in range(batch_size)]
+            audio_seconds = sum(duration for _, duration in batch)
+            stage_samples = {stage: [] for stage in STAGES}
+            latencies, rtfs = [], []
+
+            for _ in range(args.repeats):
+                processed, stage_totals = [], dict.fromkeys(STAGES, 0.0)
+                try:
+                    for path, _ in batch:
+                        temp_path, timings = process_clip(path, args.vad, args.resampler)
+                        processed.append(temp_path)
+                        for stage, seconds in timings.items():
+                            stage_totals[stage] += seconds
+
+                    start = time.perf_counter()
+                    manager.transcribe_files(processed)
+                    stage_totals["inference"] = time.perf_counter() - start
+                finally:
+                    for temp_path in processed:
+                        os.unlink(temp_path)
+
+                total = sum(stage_totals.values())
+                for stage, seconds in stage_totals.items():
+                    stage_samples[stage].append(seconds)
+                latencies.append(total)
+                rtfs.append(total / audio_seconds)
+
+            results.append({
+                "profile": profile,
+                "clips": label,
+                "batch_size": batch_size,
+                "audio_seconds": round(audio_seconds, 3),
+                "latency": summarize(latencies),
+                "rtf": summarize(rtfs),
+                "stages": {stage: summarize(values) for stage, values in stage_samples.items()},
+                "peak_rss_mb": peak_rss_mb(),
+            })
+            print(f"{profile:>8} {label:>9} batch={batch_size} "
+                  f"p50={results[-1]['latency']['p50']:.3f}s rtf={results[-1]['rtf']['p50']:.3f}", file=sys.stderr)
+
+    return {"startup_phases": manager.phases, "threads": manager.threads, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ASR latency, real-time factor and memory")
+    parser.add_argument("--model", default=os.getenv("ASR_MODEL_PATH", "sanskrit.nemo"))
+    parser.add_argument("--graph", default=os.getenv("ASR_GRAPH_PATH") or None, help="Benchmark an exported graph instead")
+    parser.add_argument("--checkpoint-cache-dir", default=os.getenv("ASR_CHECKPOINT_CACHE_DIR", ""))
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--durations", nargs="+", type=float, default=[1, 3, 5, 10])
+    parser.add_argument("--source-rate", type=int, default=48000, help="Sample rate of the synthetic clips")
+    parser.add_argument("--reference-dir", help="Use these audio files instead of synthetic clips")
+    parser.add_argument("--max-batch", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--vad", action="store_true", help="Include VAD trimming in preprocessing")
+    parser.add_argument("--resampler", default="polyphase", choices=list(RESAMPLERS),
+                        help="Resampler used in preprocessing (see resampling.py for a quality comparison)")
+    parser.add_argument("--output", default="asr_benchmark.json")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="asr-bench-")
+    try:
+        clips = prepare_clips(args, workdir)
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "source_rate": args.source_rate,
+                "repeats": args.repeats,
+                "vad": args.vad,
+                "resampler": args.resampler,
+            },
+            "profiles": {profile: benchmark_profile(profile, clips, args) for profile in args.profiles},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote benchmark results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
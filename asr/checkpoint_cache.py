@@ -0,0 +1,106 @@
+"""
+Extracted-checkpoint cache for ``.nemo`` archives.
+
+``restore_from`` normally untars the archive into a fresh temp directory on
+every start. Here the archive is extracted once into ``<cache_root>/<hash>``
+and later starts (and every worker) point NeMo at that directory instead.
+"""
+
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+
+from transcription_cache import file_checksum
+
+COMPLETE_MARKER = ".complete"
+CHECKSUM_INDEX = "checksums.json"
+
+
+def cached_file_checksum(path, cache_root):
+    """Hash the archive once per (path, size, mtime) instead of on every start."""
+    stat = os.stat(path)
+    signature = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    index_path = os.path.join(cache_root, CHECKSUM_INDEX)
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    if signature in index:
+        return index[signature]
+
+    checksum = file_checksum(path)
+    index = {key: value for key, value in index.items() if not key.startswith(f"{os.path.abspath(path)}:")}
+    index[signature] = checksum
+    try:
+        os.makedirs(cache_root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"Error writing checkpoint checksum index: {e}")
+    return checksum
+
+
+def extract_checkpoint(nemo_path, cache_root, checksum):
+    """Return a directory holding the extracted archive, extracting it if needed."""
+    target = os.path.join(cache_root, checksum[:16])
+    if os.path.exists(os.path.join(target, COMPLETE_MARKER)):
+        return target
+
+    os.makedirs(cache_root, exist_ok=True)
+    # Extract into a private staging dir and rename it into place, so a
+    # concurrently starting worker never sees a half-written checkpoint
+    staging = tempfile.mkdtemp(dir=cache_root, prefix=".extract-")
+    try:
+        with tarfile.open(nemo_path, "r:*") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(staging, filter="data")
+            else:
+                tar.extractall(staging)
+        open(os.path.join(staging, COMPLETE_MARKER), "w").close()
+        os.rename(staging, target)
+    except OSError:
+        if not os.path.exists(os.path.join(target, COMPLETE_MARKER)):
+            raise
+        # Another worker finished extracting first
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    prune_stale_checkpoints(cache_root, keep=os.path.basename(target))
+    return target
+
+
+def prune_stale_checkpoints(cache_root, keep):
+    for name in os.listdir(cache_root):
+        path = os.path.join(cache_root, name)
+        if name == keep or name.startswith(".") or not os.path.isdir(path):
+            continue
+        if os.path.exists(os.path.join(path, COMPLETE_MARKER)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def make_restore_connector(extracted_dir, mmap=True):
+    """A SaveRestoreConnector that reads from ``extracted_dir`` and mmaps the weights."""
+    import torch
+    from nemo.core.connectors.save_restore_connector import SaveRestoreConnector
+
+    class CachedCheckpointConnector(SaveRestoreConnector):
+        @staticmethod
+        def _load_state_dict_from_disk(model_weights, map_location=None):
+            if mmap:
+                try:
+                    return torch.load(model_weights, map_location=map_location, mmap=True)
+                except (TypeError, RuntimeError) as e:
+                    # Older torch, or a checkpoint saved in the legacy format
+                    print(f"Memory-mapped checkpoint load unavailable, falling back: {e}")
+            return torch.load(model_weights, map_location=map_location)
+
+    connector = CachedCheckpointConnector()
+    connector.model_extracted_dir = extracted_dir
+    return connector
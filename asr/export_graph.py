@@ -0,0 +1,156 @@
+"""
+Export the preprocessor, encoder and CTC head as a single inference graph.
+
+    python export_graph.py --format torchscript --output sanskrit_ctc.ts
+    python export_graph.py --format onnx --output sanskrit_ctc.onnx --verify-audio tes.wav
+
+Writes the artifact plus a ``<artifact>.json`` sidecar with the vocabulary
+needed for greedy CTC decoding. Serve it by setting ``ASR_GRAPH_PATH``.
+"""
+
+import argparse
+import inspect
+import json
+import os
+
+import numpy as np
+
+from graph_runtime import GraphTranscriber, metadata_path
+from transcription_cache import file_checksum
+
+SAMPLE_RATE = 16000
+
+
+def _ctc_head(model):
+    # Hybrid RNNT/CTC checkpoints keep the CTC head separately
+    return getattr(model, "ctc_decoder", None) or model.decoder
+
+
+def _vocabulary(model, language_id):
+    tokenizer = getattr(model, "tokenizer", None)
+    tokenizers = getattr(tokenizer, "tokenizers_dict", None)
+    if tokenizers and language_id in tokenizers:
+        lang_tokenizer = tokenizers[language_id]
+        return [lang_tokenizer.ids_to_tokens([i])[0] for i in range(lang_tokenizer.vocab_size)]
+    return list(_ctc_head(model).vocabulary)
+
+
+def build_inference_graph(model, language_id):
+    import torch
+
+    head = _ctc_head(model)
+    head_accepts_language = "language_ids" in inspect.signature(head.forward).parameters
+
+    class CTCInferenceGraph(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.preprocessor = model.preprocessor
+            self.encoder = model.encoder
+            self.head = head
+
+        def forward(self, audio_signal, length):
+            features, feature_lengths = self.preprocessor(input_signal=audio_signal, length=length)
+            encoded, encoded_lengths = self.encoder(audio_signal=features, length=feature_lengths)
+            if head_accepts_language:
+                log_probs = self.head(encoder_output=encoded, language_ids=[language_id])
+            else:
+                log_probs = self.head(encoder_output=encoded)
+            return log_probs, encoded_lengths
+
+    return CTCInferenceGraph().eval()
+
+
+def export_graph(model_path, output_path, export_format="torchscript", language_id="sa", max_duration=30.0):
+    import torch
+    import nemo.collections.asr as nemo_asr
+    from nemo.core.classes.common import typecheck
+
+    model = nemo_asr.models.EncDecCTCModel.restore_from(model_path, map_location="cpu")
+    model.eval()
+    model.cur_decoder = "ctc"
+    model.preprocessor.featurizer.dither = 0.0
+    model.preprocessor.featurizer.pad_to = 0
+
+    # Size positional encodings for the longest clip we serve, so tracing
+    # doesn't freeze the "grow the table" branch in the middle of a request
+    if hasattr(model.encoder, "update_max_seq_length"):
+        max_frames = int(max_duration * SAMPLE_RATE / model.preprocessor.featurizer.hop_length) + 1
+        model.encoder.update_max_seq_length(seq_length=max_frames, device=torch.device("cpu"))
+
+    graph = build_inference_graph(model, language_id)
+    example_signal = torch.randn(1, SAMPLE_RATE, dtype=torch.float32) * 0.01
+    example_length = torch.tensor([SAMPLE_RATE], dtype=torch.int64)
+
+    typecheck.set_typecheck_enabled(False)
+    try:
+        with torch.no_grad():
+            if export_format == "torchscript":
+                traced = torch.jit.trace(graph, (example_signal, example_length), check_trace=False)
+                traced.save(output_path)
+            elif export_format == "onnx":
+                torch.onnx.export(
+                    graph,
+                    (example_signal, example_length),
+                    output_path,
+                    input_names=["audio_signal", "length"],
+                    output_names=["log_probs", "encoded_lengths"],
+                    dynamic_axes={
+                        "audio_signal": {0: "batch", 1: "samples"},
+                        "length": {0: "batch"},
+                        "log_probs": {0: "batch", 1: "frames"},
+                        "encoded_lengths": {0: "batch"},
+                    },
+                    opset_version=17,
+                )
+            else:
+                raise ValueError(f"Unsupported export format: {export_format}")
+    finally:
+        typecheck.set_typecheck_enabled(True)
+
+    vocabulary = _vocabulary(model, language_id)
+    metadata = {
+        "format": export_format,
+        "sample_rate": SAMPLE_RATE,
+        "language_id": language_id,
+        "vocabulary": vocabulary,
+        "blank_id": len(vocabulary),
+        "max_duration": max_duration,
+        "source_model_checksum": file_checksum(model_path),
+    }
+    with open(metadata_path(output_path), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    return model
+
+
+def verify_graph(model, output_path, audio_path, language_id="sa"):
+    """Compare the exported graph's transcript with the full NeMo model's."""
+    import librosa
+
+    audio, _ = librosa.load(audio_path, sr=SAMPLE_RATE)
+    expected = model.transcribe([audio_path], batch_size=1, logprobs=False, language_id=language_id)[0][0]
+    actual = GraphTranscriber(output_path).transcribe_arrays([audio.astype(np.float32)])[0]
+    return {"expected": expected, "actual": actual, "match": expected.strip() == actual.strip()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the ASR model as a single TorchScript/ONNX graph")
+    parser.add_argument("--model", default=os.getenv("ASR_MODEL_PATH", "sanskrit.nemo"))
+    parser.add_argument("--format", choices=["torchscript", "onnx"], default="torchscript")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--language-id", default="sa")
+    parser.add_argument("--max-duration", type=float, default=30.0, help="Longest clip (seconds) the graph must handle")
+    parser.add_argument("--verify-audio", help="Audio file used to check the graph against the NeMo model")
+    args = parser.parse_args(argv)
+
+    model = export_graph(args.model, args.output, args.format, args.language_id, args.max_duration)
+    print(f"Exported {args.format} graph to {args.output}")
+
+    if args.verify_audio:
+        result = verify_graph(model, args.output, args.verify_audio, args.language_id)
+        print(json.dumps(result, ensure_ascii=False))
+        if not result["match"]:
+            raise SystemExit("Exported graph transcript differs from the NeMo model")
+
+
+if __name__ == "__main__":
+    main()
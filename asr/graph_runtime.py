@@ -0,0 +1,121 @@
+"""
+Lightweight runtime for an exported CTC inference graph.
+
+Serves a TorchScript or ONNX artifact produced by ``export_graph.py`` with
+greedy CTC decoding, without importing NeMo at all.
+"""
+
+import json
+
+import numpy as np
+import soundfile as sf
+
+WORD_BOUNDARY = "▁"
+
+
+def metadata_path(artifact_path):
+    return f"{artifact_path}.json"
+
+
+def ctc_greedy_decode(log_probs, length, vocabulary, blank_id):
+    best = np.argmax(log_probs[:length], axis=-1)
+    tokens = []
+    previous = None
+    for token_id in best:
+        token_id = int(token_id)
+        if token_id != previous and token_id != blank_id and token_id < len(vocabulary):
+            tokens.append(vocabulary[token_id])
+        previous = token_id
+    return "".join(tokens).replace(WORD_BOUNDARY, " ").strip()
+
+
+class GraphTranscriber:
+    def __init__(self, artifact_path, num_threads=None):
+        with open(metadata_path(artifact_path), "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+        self.vocabulary = self.metadata["vocabulary"]
+        self.blank_id = self.metadata["blank_id"]
+        self.sample_rate = self.metadata["sample_rate"]
+        self.format = self.metadata["format"]
+        # Positional encodings were sized for clips up to max_duration at export; longer clips are split
+        max_duration = self.metadata.get("max_duration")
+        self.max_samples = int(max_duration * self.sample_rate) if max_duration else None
+
+        if self.format == "torchscript":
+            import torch
+            self._module = torch.jit.load(artifact_path, map_location="cpu")
+            self._module.eval()
+        elif self.format == "onnx":
+            try:
+                import onnxruntime as ort
+            except ImportError:
+                raise ImportError("Serving an ONNX graph requires the 'onnxruntime' package")
+            options = ort.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            self._session = ort.InferenceSession(artifact_path, options, providers=["CPUExecutionProvider"])
+        else:
+            raise ValueError(f"Unsupported graph format: {self.format}")
+
+    def split_long(self, audio):
+        """Pieces of at most max_samples, each cut at the quietest 20 ms frame in its last tenth."""
+        if self.max_samples is None or len(audio) <= self.max_samples:
+            return [audio]
+        frame = max(1, self.sample_rate // 50)
+        search = max(frame, self.max_samples // 10)
+        pieces = []
+        start = 0
+        while len(audio) - start > self.max_samples:
+            end = start + self.max_samples
+            window = audio[end - search:end]
+            frames = len(window) // frame
+            energy = np.square(window[:frames * frame].reshape(frames, frame)).sum(axis=-1)
+            cut = end - search + int(np.argmin(energy)) * frame
+            if cut <= start:
+                cut = end
+            pieces.append(audio[start:cut])
+            start = cut
+        pieces.append(audio[start:])
+        return pieces
+
+    def transcribe_arrays(self, arrays):
+        """One transcript per clip; clips longer than the exported max_duration run as several pieces."""
+        if not arrays:
+            return []
+        pieces = [self.split_long(audio) for audio in arrays]
+        texts = self._transcribe_pieces([piece for clip in pieces for piece in clip])
+        results = []
+        for clip in pieces:
+            results.append(" ".join(text for text in texts[:len(clip)] if text))
+            texts = texts[len(clip):]
+        return results
+
+    def _transcribe_pieces(self, arrays):
+        lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+        batch = np.zeros((len(arrays), int(lengths.max())), dtype=np.float32)
+        for i, audio in enumerate(arrays):
+            batch[i, :len(audio)] = audio
+
+        log_probs, encoded_lengths = self._run(batch, lengths)
+        return [
+            ctc_greedy_decode(log_probs[i], int(encoded_lengths[i]), self.vocabulary, self.blank_id)
+            for i in range(len(arrays))
+        ]
+
+    def transcribe(self, paths, **kwargs):
+        # Mirrors the NeMo result shape the service reads: result[0][i]
+        arrays = [sf.read(path, dtype="float32")[0] for path in paths]
+        return [self.transcribe_arrays(arrays)]
+
+    def _run(self, batch, lengths):
+        if self.format == "onnx":
+            log_probs, encoded_lengths = self._session.run(
+                ["log_probs", "encoded_lengths"],
+                {"audio_signal": batch, "length": lengths},
+            )
+            return log_probs, encoded_lengths
+
+        import torch
+        with torch.inference_mode():
+            log_probs, encoded_lengths = self._module(torch.from_numpy(batch), torch.from_numpy(lengths))
+        return log_probs.float().numpy(), encoded_lengths.numpy()
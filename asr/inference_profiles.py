@@ -0,0 +1,188 @@
+"""
+CPU inference profiles for the ASR model.
+
+    fp32     inference mode, full precision (same transcripts as before)
+    int8     fp32 plus dynamic int8 quantization of the encoder's Linear layers
+    bf16     fp32 plus bfloat16 autocast, only where the CPU supports it
+    default  the original behaviour: no inference mode, no precision changes
+
+Run this module directly to compare every profile against fp32 on a
+reference set of audio files.
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class InferenceProfile:
+    name: str
+    inference_mode: bool = True
+    quantize_int8: bool = False
+    bf16: bool = False
+
+
+PROFILES = {
+    "default": InferenceProfile("default", inference_mode=False),
+    "fp32": InferenceProfile("fp32"),
+    "int8": InferenceProfile("int8", quantize_int8=True),
+    "bf16": InferenceProfile("bf16", bf16=True),
+}
+
+
+def get_profile(name):
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown inference profile '{name}', expected one of: {', '.join(PROFILES)}")
+
+
+def configure_threads(num_threads=None, workers=1):
+    """Size the intra-op pool so that workers x threads matches the core count."""
+    import torch
+
+    threads = num_threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1 if threads <= 2 else 2)
+    except RuntimeError:
+        # Only settable before the first parallel op in the process
+        pass
+    return threads
+
+
+def bf16_supported():
+    import torch
+
+    try:
+        if torch.ops.mkldnn._is_mkldnn_bf16_supported():
+            return True
+    except (AttributeError, RuntimeError):
+        pass
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+        return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        return False
+
+
+def apply_profile(model, profile, device):
+    import torch
+
+    if profile.quantize_int8:
+        if device.type != "cpu":
+            print(f"Profile '{profile.name}': int8 dynamic quantization is CPU-only, skipping on {device}")
+        else:
+            model.encoder = torch.ao.quantization.quantize_dynamic(model.encoder, {torch.nn.Linear}, dtype=torch.qint8)
+    if profile.bf16 and device.type == "cpu" and not bf16_supported():
+        print(f"Profile '{profile.name}': CPU has no native bf16 support, running in fp32")
+    return model
+
+
+@contextmanager
+def inference_context(profile, device):
+    import torch
+
+    with ExitStack() as stack:
+        if profile.inference_mode:
+            stack.enter_context(torch.inference_mode())
+        if profile.bf16 and (device.type != "cpu" or bf16_supported()):
+            stack.enter_context(torch.autocast(device_type=device.type, dtype=torch.bfloat16))
+        yield
+
+
+def _reference_files(reference_dir):
+    audio_ext = (".wav", ".flac", ".ogg", ".mp3", ".webm")
+    return sorted(
+        os.path.join(reference_dir, name)
+        for name in os.listdir(reference_dir)
+        if name.lower().endswith(audio_ext)
+    )
+
+
+def _read_reference_text(audio_path):
+    text_path = os.path.splitext(audio_path)[0] + ".txt"
+    if not os.path.exists(text_path):
+        return None
+    with open(text_path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def _transcribe(model, profile, device, files, language_id):
+    with inference_context(profile, device):
+        result = model.transcribe(files, batch_size=1, logprobs=False, language_id=language_id)
+    # Same shape the service relies on: result[0] holds one transcript per file
+    return list(result[0]) if result else [""] * len(files)
+
+
+def compare_profiles(model_path, reference_dir, profile_names, language_id="sa", num_threads=None):
+    """Transcribe the reference set with every profile and score it against fp32."""
+    import jiwer
+    import torch
+    import nemo.collections.asr as nemo_asr
+
+    configure_threads(num_threads)
+    files = _reference_files(reference_dir)
+    if not files:
+        raise ValueError(f"No audio files found in {reference_dir}")
+
+    device = torch.device("cpu")
+    base_model = nemo_asr.models.EncDecCTCModel.restore_from(model_path, map_location="cpu")
+    base_model.eval()
+    base_model.cur_decoder = "ctc"
+
+    baseline = None
+    report = {"reference_dir": reference_dir, "files": len(files), "profiles": {}}
+    for name in ["fp32"] + [n for n in profile_names if n != "fp32"]:
+        profile = get_profile(name)
+        model = apply_profile(copy.deepcopy(base_model), profile, device)
+
+        start = time.perf_counter()
+        transcripts = _transcribe(model, profile, device, files, language_id)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = transcripts
+        entry = {
+            "seconds": round(elapsed, 3),
+            "wer_vs_fp32": round(jiwer.wer(baseline, transcripts), 4),
+            "cer_vs_fp32": round(jiwer.cer(baseline, transcripts), 4),
+            "mismatches": [
+                {"file": os.path.basename(f), "fp32": ref, name: hyp}
+                for f, ref, hyp in zip(files, baseline, transcripts)
+                if ref != hyp
+            ],
+        }
+
+        references = [_read_reference_text(f) for f in files]
+        if all(ref is not None for ref in references):
+            entry["wer_vs_reference"] = round(jiwer.wer(references, transcripts), 4)
+            entry["cer_vs_reference"] = round(jiwer.cer(references, transcripts), 4)
+
+        report["profiles"][name] = entry
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare CPU inference profiles against fp32 transcripts")
+    parser.add_argument("--model", default=os.getenv("ASR_MODEL_PATH", "sanskrit.nemo"))
+    parser.add_argument("--reference-dir", required=True, help="Audio files, optionally with <name>.txt references")
+    parser.add_argument("--profiles", nargs="+", default=["int8", "bf16"], choices=list(PROFILES))
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--language-id", default="sa")
+    args = parser.parse_args(argv)
+
+    report = compare_profiles(args.model, args.reference_dir, args.profiles, args.language_id, args.threads)
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
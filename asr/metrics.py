@@ -0,0 +1,225 @@
+"""
+In-process metrics for the ASR service.
+
+Histograms, counters and gauges are kept in memory and rendered in the
+Prometheus text format on ``/metrics``. A ``RequestTrace`` times the stages of
+one transcription (decode, resample, vad, write, queue_wait, inference) and,
+when ``ASR_REQUEST_LOG`` is set, writes one JSON line per request.
+
+Each process keeps its own numbers; in multi-worker mode every sample carries
+the worker's pid so scrapes through the shared port can be told apart.
+"""
+
+import bisect
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+AUDIO_BUCKETS = (0.5, 1, 2, 3, 5, 10, 20, 30, 60)
+RTF_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series["counts"]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(series['sum'], 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from a callback returning a number or {labels_tuple: number}."""
+
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        values = value if isinstance(value, dict) else {(): value}
+        for key, number in values.items():
+            if number is not None:
+                lines.append(f"{self.name}{_format_labels(key)} {number}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self.add(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, help_text, buckets))
+
+    def gauge(self, name, help_text, fn):
+        return self.add(Gauge(name, help_text, fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KiB on Linux and bytes on macOS; peak rather than current
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+registry = MetricsRegistry()
+stage_seconds = registry.histogram("asr_stage_seconds", "Time spent per transcription stage")
+request_seconds = registry.histogram("asr_request_seconds", "End-to-end time per transcribed clip")
+audio_seconds = registry.histogram("asr_audio_seconds", "Duration of submitted audio", AUDIO_BUCKETS)
+real_time_factor = registry.histogram("asr_real_time_factor", "Processing time divided by audio duration", RTF_BUCKETS)
+batch_size = registry.histogram("asr_batch_size", "Clips per model forward pass", BATCH_BUCKETS)
+requests_total = registry.counter("asr_requests_total", "Transcribed clips by source and outcome")
+
+
+class RequestTrace:
+    def __init__(self, source, filename=None):
+        self.source = source
+        self.filename = filename
+        self.stages = {}
+        self.audio_seconds = None
+        self.status = "ok"
+        self.cached = False
+        self.error = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def rounded_stages(self):
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+    def fail(self, status, error):
+        self.status = status
+        self.error = str(error)
+
+    def finish(self):
+        total = time.perf_counter() - self._started
+        pid = os.getpid()
+        for name, seconds in self.stages.items():
+            stage_seconds.observe(seconds, stage=name, pid=pid)
+        request_seconds.observe(total, source=self.source, pid=pid)
+        requests_total.inc(source=self.source, status="cached" if self.cached else self.status, pid=pid)
+
+        rtf = None
+        if self.audio_seconds:
+            audio_seconds.observe(self.audio_seconds, pid=pid)
+            rtf = total / self.audio_seconds
+            if self.status == "ok":
+                real_time_factor.observe(rtf, pid=pid)
+
+        if request_log.handlers:
+            request_log.info(json.dumps({
+                "ts": time.time(),
+                "pid": pid,
+                "source": self.source,
+                "file": self.filename,
+                "status": self.status,
+                "cached": self.cached,
+                "error": self.error,
+                "audio_seconds": round(self.audio_seconds, 3) if self.audio_seconds else None,
+                "total_seconds": round(total, 4),
+                "rtf": round(rtf, 4) if rtf is not None else None,
+                "stages": self.rounded_stages(),
+            }, ensure_ascii=False))
+        return total
+
+
+request_log = logging.getLogger("asr.requests")
+request_log.propagate = False
+
+
+def configure_request_log(destination):
+    """``stdout``/``stderr`` or a file path; empty disables structured request logs."""
+    if not destination or request_log.handlers:
+        return
+    if destination in ("stdout", "stderr"):
+        handler = logging.StreamHandler(getattr(sys, destination))
+    else:
+        handler = logging.FileHandler(destination, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    request_log.addHandler(handler)
+    request_log.setLevel(logging.INFO)
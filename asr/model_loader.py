@@ -0,0 +1,226 @@
+"""
+Background model loading for the ASR service.
+
+The HTTP server binds first; the heavy imports, ``restore_from`` and a
+synthetic warm-up batch run on a background thread, and every phase is timed
+so the readiness endpoint can report where startup time went.
+
+In multi-worker mode the parent calls ``load_shared`` before forking and each
+worker calls ``activate_worker`` (see multiworker.py).
+"""
+
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import soundfile as sf
+
+from checkpoint_cache import cached_file_checksum, extract_checkpoint, make_restore_connector
+from inference_profiles import apply_profile, configure_threads, get_profile, inference_context
+from transcription_cache import file_checksum
+
+SAMPLE_RATE = 16000
+
+
+class ModelNotReady(Exception):
+    pass
+
+
+class ModelManager:
+    def __init__(self, model_path, language_id="sa", warmup_seconds=1.0, checkpoint_cache_dir=None,
+                 profile="fp32", num_threads=None, workers=1, graph_path=None):
+        self.model_path = model_path
+        self.graph_path = graph_path
+        self.checkpoint_cache_dir = checkpoint_cache_dir
+        self.profile = get_profile(profile)
+        self.num_threads = num_threads
+        self.workers = workers
+        self.threads = None
+        self.language_id = language_id
+        self.warmup_seconds = warmup_seconds
+        self.model = None
+        self.device = None
+        self.model_checksum = None
+        self.state = "starting"
+        self.error = None
+        self.phases = {}
+        self._started_at = time.perf_counter()
+        self._ready = threading.Event()
+        self._finished = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load_safely, name="asr-model-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def load(self):
+        self.state = "loading"
+        with self._phase("import_torch"):
+            import torch
+        with self._phase("configure_threads"):
+            self.threads = configure_threads(self.num_threads, self.workers)
+        if self.graph_path:
+            self._load_graph()
+        else:
+            self._load_nemo_model()
+        self._warm_up_and_mark_ready()
+
+    def load_shared(self):
+        """Pre-fork parent: load the weights once and move them into shared memory.
+
+        The parent stays single-threaded and never runs inference, so no
+        OpenMP pool exists when workers fork. Exported graphs are loaded per
+        worker instead, since an onnxruntime session cannot cross a fork.
+        """
+        self.state = "loading"
+        with self._phase("import_torch"):
+            import torch
+        torch.set_num_threads(1)
+        if not self.graph_path:
+            self._load_nemo_model()
+            with self._phase("share_memory"):
+                self.model.share_memory()
+        self.state = "loaded"
+
+    def activate_worker(self):
+        """Forked worker: size this process's thread pool, then warm up and mark ready."""
+        try:
+            with self._phase("configure_threads"):
+                self.threads = configure_threads(self.num_threads, self.workers)
+            if self.graph_path:
+                self._load_graph()
+            self._warm_up_and_mark_ready()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"Error starting ASR worker: {e}")
+            raise
+        finally:
+            self._finished.set()
+
+    def _warm_up_and_mark_ready(self):
+        self.state = "warming_up"
+        with self._phase("warmup"):
+            self._warm_up()
+
+        self.phases["total"] = round(time.perf_counter() - self._started_at, 3)
+        self.state = "ready"
+        self._ready.set()
+        print(f"ASR model ready in {self.phases['total']}s")
+
+    def _load_graph(self):
+        # Exported TorchScript/ONNX graph: no NeMo import, no per-module dispatch
+        import torch
+        from graph_runtime import GraphTranscriber
+
+        with self._phase("import_audio"):
+            import librosa  # noqa: F401 - preloaded so the first request doesn't pay for it
+        with self._phase("checksum"):
+            self.model_checksum = file_checksum(self.graph_path)
+        with self._phase("load_graph"):
+            self.device = torch.device("cpu")
+            self.model = GraphTranscriber(self.graph_path, num_threads=self.threads)
+
+    def _load_nemo_model(self):
+        import torch
+
+        with self._phase("import_nemo"):
+            import nemo.collections.asr as nemo_asr
+        with self._phase("import_audio"):
+            import librosa  # noqa: F401 - preloaded so the first request doesn't pay for it
+        if self.checkpoint_cache_dir:
+            with self._phase("checksum"):
+                self.model_checksum = cached_file_checksum(self.model_path, self.checkpoint_cache_dir)
+            with self._phase("extract"):
+                extracted_dir = extract_checkpoint(self.model_path, self.checkpoint_cache_dir, self.model_checksum)
+            with self._phase("restore"):
+                model = nemo_asr.models.EncDecCTCModel.restore_from(
+                    self.model_path,
+                    map_location="cpu",
+                    save_restore_connector=make_restore_connector(extracted_dir),
+                )
+        else:
+            with self._phase("checksum"):
+                self.model_checksum = file_checksum(self.model_path)
+            with self._phase("restore"):
+                model = nemo_asr.models.EncDecCTCModel.restore_from(self.model_path)
+        with self._phase("to_device"):
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            model.eval()
+            model = model.to(self.device)
+            model.cur_decoder = "ctc"
+        with self._phase("apply_profile"):
+            self.model = apply_profile(model, self.profile, self.device)
+
+    def transcribe_files(self, paths):
+        with inference_context(self.profile, self.device):
+            return self.model.transcribe(paths, batch_size=len(paths), logprobs=False, language_id=self.language_id)
+
+    def model_memory_bytes(self):
+        """Bytes held by parameters and buffers (artifact size for exported graphs)."""
+        if self.model is None:
+            return None
+        if hasattr(self.model, "parameters"):
+            tensors = list(self.model.parameters()) + list(self.model.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        return os.path.getsize(self.graph_path) if self.graph_path else None
+
+    def wait_ready(self, timeout=None):
+        self._finished.wait(timeout)
+        if not self._ready.is_set():
+            raise ModelNotReady(f"ASR model is not ready (state: {self.state})")
+        return self.model
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "ready": self.is_ready(),
+            "device": str(self.device) if self.device else None,
+            "profile": self.profile.name,
+            "graph": self.graph_path,
+            "threads": self.threads,
+            "workers": self.workers,
+            "pid": os.getpid(),
+            "phases": dict(self.phases),
+            "uptime": round(time.perf_counter() - self._started_at, 3),
+            "error": self.error,
+        }
+
+    def _load_safely(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"Error loading ASR model: {e}")
+        finally:
+            self._finished.set()
+
+    def _warm_up(self):
+        # Low-level noise rather than silence so the encoder runs its normal path
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(int(SAMPLE_RATE * self.warmup_seconds)) * 0.01).astype(np.float32)
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+        try:
+            sf.write(temp_file.name, audio, SAMPLE_RATE)
+            temp_file.close()
+            self.transcribe_files([temp_file.name])
+        finally:
+            os.unlink(temp_file.name)
+
+    @contextmanager
+    def _phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - start, 3)
+            print(f"ASR startup phase '{name}' took {self.phases[name]}s")
@@ -0,0 +1,124 @@
+"""
+Pre-fork serving: several worker processes, one copy of the model weights.
+
+    ASR_WORKERS=4 python app.py
+
+The parent loads the model once, moves its parameters into shared memory and
+binds the listening socket, then forks the workers. Workers inherit both and
+only read the weights, so RAM stays close to a single process. Each worker
+sizes its own torch thread pool to ``cores // workers``, warms up in its own
+process (OpenMP pools do not survive a fork) and accepts connections on the
+shared socket. A worker that dies is replaced; one that fails to start is
+retried with exponential backoff and given up on after a few failures in a row.
+"""
+
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+STARTUP_FAILED = 3    # worker exit code: the model never became ready in that worker
+
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(index, app, model_manager, sock):
+    # Drop the parent's handlers; uvicorn installs its own for graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    model_manager.activate_worker()
+    print(f"ASR worker {index} (pid {os.getpid()}) serving with {model_manager.threads} threads")
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+    server.run(sockets=[sock])
+
+
+def _spawn(index, app, model_manager, sock):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(index, app, model_manager, sock)
+        except BaseException as e:
+            print(f"ASR worker {index} failed: {e}", file=sys.stderr)
+            code = STARTUP_FAILED if model_manager.state == "failed" else 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(app, model_manager, host="0.0.0.0", port=7860, respawn_delay=1.0,
+          max_respawn_delay=60.0, max_startup_failures=5):
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-worker mode needs os.fork; run with ASR_WORKERS=1 on this platform")
+
+    model_manager.load_shared()
+    sock = bind_socket(host, port)
+    print(f"ASR parent (pid {os.getpid()}) loaded model in {model_manager.phases}, "
+          f"forking {model_manager.workers} workers on {host}:{port}")
+
+    workers = {_spawn(i, app, model_manager, sock): i for i in range(model_manager.workers)}
+    failures = {i: 0 for i in workers.values()}    # consecutive startup failures per worker slot
+    restarts = {}    # worker index -> time.monotonic() its replacement is due
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers or (restarts and not stopping):
+        if restarts and not stopping:
+            now = time.monotonic()
+            for index, due in list(restarts.items()):
+                if due <= now:
+                    del restarts[index]
+                    workers[_spawn(index, app, model_manager, sock)] = index
+        try:
+            if restarts and not stopping:
+                # A replacement is pending: poll, so it starts on time while other workers keep running
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    time.sleep(min(0.5, max(0.0, min(restarts.values()) - time.monotonic())))
+                    continue
+            else:
+                pid, status = os.wait()
+        except ChildProcessError:
+            if restarts and not stopping:
+                time.sleep(max(0.0, min(restarts.values()) - time.monotonic()))
+                continue
+            break
+        except InterruptedError:
+            continue
+        index = workers.pop(pid, None)
+        if index is None or stopping:
+            continue
+
+        failures[index] = failures[index] + 1 if os.waitstatus_to_exitcode(status) == STARTUP_FAILED else 0
+        if failures[index] >= max_startup_failures:
+            print(f"ASR worker {index} failed to start {failures[index]} times in a row, not restarting it",
+                  file=sys.stderr)
+            continue
+        delay = min(respawn_delay * 2 ** max(failures[index] - 1, 0), max_respawn_delay)
+        print(f"ASR worker {index} (pid {pid}) exited with status {status}, restarting in {delay:g}s", file=sys.stderr)
+        restarts[index] = time.monotonic() + delay
+
+    sock.close()
+    if not stopping:
+        raise RuntimeError(f"No ASR workers left: each failed to start {max_startup_failures} times in a row")
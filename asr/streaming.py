@@ -0,0 +1,146 @@
+"""
+Rolling-window streaming transcription.
+
+Microphone audio arrives in small chunks. A ``StreamingSession`` keeps the
+current utterance in a 16 kHz buffer, re-decodes it every
+``partial_interval`` seconds of new audio to produce a partial transcript,
+and commits the utterance as soon as ``endpoint_ms`` of trailing silence
+follows speech, so the final answer is ready right after the speaker stops.
+Utterances longer than ``window_seconds`` are cut at the quietest recent
+frame and committed piecewise, which keeps every decode bounded.
+"""
+
+import numpy as np
+
+from resampling import StreamingResampler
+from vad import trim_silence
+
+TARGET_SR = 16000
+
+
+def to_mono_float32(data):
+    """Convert one captured chunk (any dtype/channel layout) to mono float32."""
+    audio = np.asarray(data)
+    if np.issubdtype(audio.dtype, np.integer):
+        audio = audio.astype(np.float32) / np.iinfo(audio.dtype).max
+    else:
+        audio = audio.astype(np.float32, copy=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio
+
+
+def _frame_rms(audio, frame_len):
+    n_frames = int(np.ceil(len(audio) / frame_len))
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(audio)] = audio
+    return np.sqrt(np.mean(padded.reshape(n_frames, frame_len) ** 2, axis=1))
+
+
+class StreamingSession:
+    def __init__(self, decode_fn, sample_rate=TARGET_SR, partial_interval=1.0, endpoint_ms=700,
+                 window_seconds=15.0, threshold_db=-40.0, min_rms=1e-3, frame_ms=20, lead_in_ms=300):
+        self.decode_fn = decode_fn
+        self.sample_rate = sample_rate
+        self.partial_interval = int(partial_interval * sample_rate)
+        self.endpoint = int(endpoint_ms * sample_rate / 1000)
+        self.window = int(window_seconds * sample_rate)
+        self.threshold_db = threshold_db
+        self.min_rms = min_rms
+        self.frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        self.lead_in = int(lead_in_ms * sample_rate / 1000)
+
+        self.committed = []
+        self.partial = ""
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.peak_rms = 0.0
+        self.heard_speech = False
+        self.silence_run = 0
+        self.since_decode = 0
+        self.decodes = 0
+        self._resampler = None
+
+    @property
+    def text(self):
+        return " ".join(part for part in self.committed + [self.partial] if part)
+
+    def feed_pcm(self, data, sample_rate):
+        """Append a captured chunk at any rate; the resampler keeps its filter state across chunks."""
+        if self._resampler is None or self._resampler.source_rate != sample_rate:
+            self._resampler = StreamingResampler(sample_rate, self.sample_rate)
+        return self.feed(self._resampler.process(to_mono_float32(data)))
+
+    def feed(self, audio):
+        """Append a 16 kHz chunk; returns the current transcript state."""
+        if len(audio) == 0:
+            return self._event(final=False)
+
+        self.buffer = np.concatenate([self.buffer, audio.astype(np.float32, copy=False)])
+        self.since_decode += len(audio)
+        self._track_energy(audio)
+
+        if not self.heard_speech:
+            # Nothing to decode yet; keep only a short lead-in so onsets survive
+            self.buffer = self.buffer[-self.lead_in:] if self.lead_in else self.buffer[:0]
+            self.since_decode = 0
+            return self._event(final=False)
+
+        if self.silence_run >= self.endpoint:
+            self._commit(self.buffer)
+            return self._event(final=True)
+
+        if len(self.buffer) >= self.window:
+            cut = self._quiet_cut()
+            self._commit(self.buffer[:cut], keep=self.buffer[cut:])
+        elif self.since_decode >= self.partial_interval:
+            self.partial = self._decode(self.buffer)
+            self.since_decode = 0
+        return self._event(final=False)
+
+    def finish(self):
+        """Flush whatever is buffered (recording stopped) and return the final transcript."""
+        if self._resampler is not None:
+            self.buffer = np.concatenate([self.buffer, self._resampler.flush()])
+            self._resampler = None
+        if self.heard_speech and len(self.buffer):
+            self._commit(self.buffer)
+        self.partial = ""
+        return self._event(final=True)
+
+    def _track_energy(self, audio):
+        for rms in _frame_rms(audio, self.frame_len):
+            self.peak_rms = max(self.peak_rms, float(rms))
+            level_db = 20 * np.log10(max(float(rms), 1e-10) / max(self.peak_rms, 1e-10))
+            if rms >= self.min_rms and level_db > self.threshold_db:
+                self.heard_speech = True
+                self.silence_run = 0
+            else:
+                self.silence_run += self.frame_len
+
+    def _quiet_cut(self):
+        # Lowest-energy frame in the last two seconds of the window
+        search = min(len(self.buffer), 2 * self.sample_rate)
+        tail = self.buffer[-search:]
+        rms = _frame_rms(tail, self.frame_len)
+        return len(self.buffer) - search + int(np.argmin(rms)) * self.frame_len
+
+    def _decode(self, audio):
+        audio, _ = trim_silence(audio, self.sample_rate)
+        if len(audio) == 0:
+            return ""
+        self.decodes += 1
+        return (self.decode_fn(audio) or "").strip()
+
+    def _commit(self, audio, keep=None):
+        text = self._decode(audio)
+        if text:
+            self.committed.append(text)
+        self.partial = ""
+        self.buffer = keep if keep is not None else np.zeros(0, dtype=np.float32)
+        self.since_decode = len(self.buffer)
+        if keep is None:
+            self.heard_speech = False
+            self.silence_run = 0
+
+    def _event(self, final):
+        return {"text": self.text, "partial": self.partial, "final": final, "decodes": self.decodes}
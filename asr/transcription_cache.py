@@ -0,0 +1,111 @@
+"""
+Content-addressed cache for transcriptions.
+
+Entries are keyed by a hash of the decoded PCM plus the checksum of the model
+archive, so a replaced ``sanskrit.nemo`` never serves stale transcripts.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """In-memory LRU tier with an optional on-disk tier below it."""
+
+    def __init__(self, model_checksum, max_entries=1024, disk_dir=None):
+        self.model_checksum = model_checksum
+        self.max_entries = max_entries
+        self.disk_dir = None
+        if disk_dir:
+            # One namespace per model, old entries are simply never looked up again
+            self.disk_dir = os.path.join(disk_dir, model_checksum[:16])
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, audio, sample_rate):
+        digest = hashlib.sha256()
+        digest.update(self.model_checksum.encode())
+        digest.update(str(sample_rate).encode())
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._remember(key, text)
+        self._write_disk(key, text)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_dir": self.disk_dir,
+            }
+
+    def _remember(self, key, text):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, text):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": text}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing transcription cache entry: {e}")
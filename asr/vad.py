@@ -0,0 +1,74 @@
+"""
+Energy-based voice-activity trimming.
+
+Survey answers are a word or two surrounded by silence. Frames whose RMS
+energy sits well below the loudest frame are treated as silence: leading and
+trailing silence is cut and long internal pauses are shortened, so the
+encoder only sees the part of the clip that carries speech.
+"""
+
+import numpy as np
+
+
+def trim_silence(audio, sample_rate, frame_ms=20, threshold_db=-40.0, min_rms=1e-4,
+                 pad_ms=150, max_pause_ms=300):
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = int(np.ceil(len(audio) / frame_len)) if len(audio) else 0
+    stats = {"frames_total": n_frames, "frames_skipped": 0, "frame_ms": frame_ms,
+             "seconds_in": round(len(audio) / sample_rate, 3)}
+
+    if n_frames == 0:
+        stats["seconds_out"] = 0.0
+        return audio, stats
+
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(audio)] = audio
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, frame_len) ** 2, axis=1))
+
+    peak = rms.max()
+    if peak < min_rms:
+        # Nothing louder than the noise floor: leave the clip untouched
+        stats["seconds_out"] = stats["seconds_in"]
+        return audio, stats
+
+    level_db = 20 * np.log10(np.maximum(rms, 1e-10) / peak)
+    speech = (level_db > threshold_db) & (rms >= min_rms)
+
+    # Hangover padding so word onsets and trailing consonants survive
+    pad = int(pad_ms / frame_ms)
+    if pad:
+        dilated = np.convolve(speech.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="full")
+        speech = dilated[pad:pad + n_frames] > 0
+
+    keep = speech.copy()
+    voiced = np.flatnonzero(speech)
+    first, last = voiced[0], voiced[-1]
+    keep[:first] = False
+    keep[last + 1:] = False
+
+    # Shorten internal pauses to max_pause_ms, keeping both edges of the gap
+    max_pause = int(max_pause_ms / frame_ms)
+    i = first
+    while i <= last:
+        if speech[i]:
+            i += 1
+            continue
+        j = i
+        while j <= last and not speech[j]:
+            j += 1
+        gap = j - i
+        if gap > max_pause:
+            head = max_pause // 2
+            keep[i:j] = False
+            keep[i:i + head] = True
+            keep[j - (max_pause - head):j] = True
+        i = j
+
+    frames = padded.reshape(n_frames, frame_len)[keep].reshape(-1)
+    # Drop the zero padding that was added to the final frame
+    if keep[-1]:
+        frames = frames[:len(frames) - (n_frames * frame_len - len(audio))]
+
+    stats["frames_skipped"] = int(n_frames - keep.sum())
+    stats["seconds_out"] = round(len(frames) / sample_rate, 3)
+    return frames.astype(audio.dtype, copy=False), stats
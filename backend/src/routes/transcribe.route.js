@@ -49,7 +49,53 @@ new SystemMessage("You are an expert Sanskrit linguist. Please return only the g
   }
 }
 
-await initializeClient();
+// Headless ASR API (POST /api/transcribe); falls back to the Gradio client when unset
+const asrApiUrl = process.env.ASR_API_URL?.replace(/\/+$/, "");
+
+async function transcribeWithApi(file) {
+  const form = new FormData();
+  form.append(
+    "audio",
+    new Blob([file.buffer], { type: file.mimetype }),
+    file.originalname || "audio.wav"
+  );
+
+  const headers = process.env.ASR_API_KEY ? { "x-api-key": process.env.ASR_API_KEY } : {};
+  const response = await fetch(`${asrApiUrl}/api/transcribe`, {
+    method: "POST",
+    headers,
+    body: form,
+  });
+  const payload = await response.json().catch(() => ({}));
+  if (!response.ok) {
+    const error = new Error(payload.error || `ASR API responded with ${response.status}`);
+    error.status = response.status;
+    error.retryAfter = response.headers.get("retry-after") ?? payload.retry_after;
+    throw error;
+  }
+
+  const [result] = payload.results;
+  if (result.error) {
+    throw new Error(result.error);
+  }
+  // Same shape as the Gradio client's result.data
+  return [result.transcription];
+}
+
+async function transcribeWithGradio(file) {
+  const audioBlob = new Blob([file.buffer], {
+    type: file.mimetype,
+  });
+
+  const result = await client.predict("/predict", {
+    audio_file: audioBlob,
+  });
+  return result.data;
+}
+
+if (!asrApiUrl) {
+  await initializeClient();
+}
 
 transcribeRouter
   .route("/transcribe")
@@ -65,15 +111,9 @@ transcribeRouter
         time: new Date().toISOString(),
       });
 
-      const audioBlob = new Blob([req.file.buffer], {
-        type: req.file.mimetype,
-      });
-
-      const result = await client.predict("/predict", {
-        audio_file: audioBlob,
-      });
-
-      const rawTranscription = result.data;
+      const rawTranscription = asrApiUrl
+        ? await transcribeWithApi(req.file)
+        : await transcribeWithGradio(req.file);
       const correctedTranscription = await correctTranscription(rawTranscription);
 
       console.log("Raw:", rawTranscription);
@@ -86,9 +126,15 @@ transcribeRouter
       });
     } catch (error) {
       console.error("❌ Transcription error:", error);
-      res.status(500).json({
+      // Pass an overloaded ASR API's status and Retry-After through, so clients back off
+      const busy = [429, 503].includes(error.status);
+      if (busy && error.retryAfter != null) {
+        res.set("Retry-After", String(error.retryAfter));
+      }
+      res.status(busy ? error.status : 500).json({
         error: "Transcription failed",
         details: error.message,
+        ...(busy && error.retryAfter != null && { retry_after: Number(error.retryAfter) }),
       });
     }
   });
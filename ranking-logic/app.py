@@ -9,6 +9,10 @@ from config.settings import Config
 from database.db_handler import DatabaseHandler
 from services.ranking_service import RankingService
 from services.final_service import FinalService
+from services.pipeline_service import PipelineService
+from services.staged_pipeline import StagedPipelineService
+from services.answer_match_service import AnswerMatchService
+from services.compaction_service import CompactionService
 from utils.logger import setup_logger
 from constants import LogMessages
 from flask_cors import CORS, cross_origin
@@ -40,8 +44,10 @@ class AppInitializer:
             db_handler = DatabaseHandler()
             ranking_service = RankingService(db_handler)
             final_service = FinalService(db_handler)
+            pipeline_service = PipelineService(db_handler, ranking_service=ranking_service)
+            answer_match_service = AnswerMatchService(db_handler)
             
-            return db_handler, ranking_service, final_service
+            return db_handler, ranking_service, final_service, pipeline_service, answer_match_service
             
         except Exception as e:
             logger.error(f"❌ Configuration error: {e}")
@@ -51,10 +57,13 @@ class AppInitializer:
 class APIEndpoints:
     """Handles API endpoint logic"""
     
-    def __init__(self, db_handler: DatabaseHandler, ranking_service: RankingService, final_service: FinalService):
+    def __init__(self, db_handler: DatabaseHandler, ranking_service: RankingService, final_service: FinalService,
+                 pipeline_service: PipelineService, answer_match_service: AnswerMatchService):
         self.db_handler = db_handler
         self.ranking_service = ranking_service
         self.final_service = final_service
+        self.pipeline_service = pipeline_service
+        self.answer_match_service = answer_match_service
     
     def health_check(self) -> dict:
         """Health check endpoint logic"""
@@ -90,23 +99,13 @@ class APIEndpoints:
         """Fetch questions logic"""
         try:
             start_time = time.time()
-            questions = self.db_handler.fetch_all_questions()
+            # Counted in the local store when one is configured
+            counts = self.db_handler.get_question_counts()
             fetch_time = round(time.time() - start_time, 2)
             
-            # Analyze questions
-            questions_with_answers = sum(1 for q in questions if q.get('answers'))
-            input_questions = sum(1 for q in questions if q.get('questionType', '').lower() == 'input')
-            mcq_questions = sum(1 for q in questions if q.get('questionType', '').lower() == 'mcq')
-            
             return {
                 "status": "success",
-                "results": {
-                    "total_questions": len(questions),
-                    "questions_with_answers": questions_with_answers,
-                    "input_questions": input_questions,
-                    "mcq_questions": mcq_questions,
-                    "processing_time": f"{fetch_time}s"
-                }
+                "results": {**counts, "processing_time": f"{fetch_time}s"}
             }
         except Exception as e:
             return {"status": "error", "error": str(e)}
@@ -138,13 +137,67 @@ class APIEndpoints:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return {"status": "error", "error": str(e)}
     
+    def process_pipeline(self, staged: bool = False) -> dict:
+        """Merge similar answers and rank in one fetch/update cycle"""
+        try:
+            start_time = time.time()
+            service = self.pipeline_service
+            if staged:
+                service = StagedPipelineService(self.db_handler, self.pipeline_service.similarity_service,
+                                                self.ranking_service)
+            result = service.process_all_questions()
+            processing_time = round(time.time() - start_time, 2)
+            
+            return {
+                "status": "success",
+                "results": {**result, "processing_time": f"{processing_time}s"}
+            }
+        except Exception as e:
+            logger.error(f"Pipeline process failed: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return {"status": "error", "error": str(e)}
+    
+    def match_answer(self, payload: dict) -> tuple:
+        """Match a live answer against a question's known answers"""
+        question_id = payload.get("questionId") or payload.get("questionID")
+        answer = payload.get("answer")
+        if not question_id or not isinstance(answer, str):
+            return {"status": "error", "error": "questionId and answer are required"}, 400
+        
+        try:
+            result = self.answer_match_service.match(question_id, answer)
+            return {"status": "success", "results": result}, 200
+        except KeyError:
+            return {"status": "error", "error": f"Question {question_id} not found"}, 404
+        except Exception as e:
+            logger.error(f"Answer matching failed: {str(e)}")
+            return {"status": "error", "error": str(e)}, 500
+    
+    def refresh_match_index(self) -> dict:
+        """Re-sync the answer matching indexes with the API now"""
+        try:
+            return {"status": "success", "results": self.answer_match_service.refresh()}
+        except Exception as e:
+            logger.error(f"Answer index refresh failed: {str(e)}")
+            return {"status": "error", "error": str(e)}
+    
+    def compact_answers(self, dry_run: bool) -> dict:
+        """Merge similar answers in oversized questions and write them back"""
+        try:
+            result = CompactionService(self.db_handler).compact(dry_run=dry_run)
+            return {"status": "success", "results": result}
+        except Exception as e:
+            logger.error(f"Compaction failed: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return {"status": "error", "error": str(e)}
+    
     def post_final_answers(self) -> dict:
         """POST final answers logic - GET, DELETE, then POST Input questions with correct answers only"""
         try:
             start_time = time.time()
             
-            # Fetch current questions from main endpoint
-            questions = self.db_handler.fetch_all_questions()
+            # Current questions from the local snapshot while fresh, otherwise from the main endpoint
+            questions = self.db_handler.load_questions()
             
             if not questions:
                 return {
@@ -918,8 +971,8 @@ class TemplateProvider:
 
 
 # Initialize application components
-db_handler, ranking_service, final_service = AppInitializer.initialize()
-api_endpoints = APIEndpoints(db_handler, ranking_service, final_service)
+db_handler, ranking_service, final_service, pipeline_service, answer_match_service = AppInitializer.initialize()
+api_endpoints = APIEndpoints(db_handler, ranking_service, final_service, pipeline_service, answer_match_service)
 
 # Route handlers
 @app.route('/')
@@ -960,6 +1013,35 @@ def process_ranking():
     status_code = 500 if result["status"] == "error" else 200
     return jsonify(result), status_code
 
+@app.route('/api/process-pipeline', methods=['POST'])
+def process_pipeline():
+    """Merge similar answers and rank with a single fetch and update"""
+    staged = request.args.get('staged', 'false').lower() == 'true'
+    result = api_endpoints.process_pipeline(staged=staged)
+    status_code = 500 if result["status"] == "error" else 200
+    return jsonify(result), status_code
+
+@app.route('/api/match-answer', methods=['POST'])
+def match_answer():
+    """Best-matching known answer for a live player answer"""
+    result, status_code = api_endpoints.match_answer(request.get_json(silent=True) or {})
+    return jsonify(result), status_code
+
+@app.route('/api/match-answer/refresh', methods=['POST'])
+def refresh_match_index():
+    """Re-sync answer matching indexes with the API"""
+    result = api_endpoints.refresh_match_index()
+    status_code = 500 if result["status"] == "error" else 200
+    return jsonify(result), status_code
+
+@app.route('/api/compact-answers', methods=['POST'])
+def compact_answers():
+    """Compact stored answer sets; ?dryRun=true only reports the savings"""
+    dry_run = request.args.get('dryRun', 'false').lower() == 'true'
+    result = api_endpoints.compact_answers(dry_run)
+    status_code = 500 if result["status"] == "error" else 200
+    return jsonify(result), status_code
+
 @app.route('/api/post-final-answers', methods=['POST'])
 def post_final_answers():
     """POST final answers to /admin/survey/final"""
@@ -1016,7 +1098,7 @@ def preview_ranking():
         # Fetch questions
         try:
             logger.info("📥 Fetching questions...")
-            questions = db_handler.fetch_all_questions()
+            questions = db_handler.load_questions()
             logger.info(f"📊 Fetched {len(questions)} questions")
             
             if not questions:
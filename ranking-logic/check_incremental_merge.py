@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check Incremental Merge - Replay answer arrival and compare incremental merging with a full re-merge
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+from config.settings import Config
+from constants import AnswerFields, QuestionFields
+from database.db_handler import DatabaseHandler
+from services.ranking_service import dense_rank_by_count
+from services.similarity_service import AnswerMerger
+from utils.data_formatters import QuestionFormatter
+from utils.logger import setup_logger
+
+COMPARED_FIELDS = (AnswerFields.ANSWER, AnswerFields.IS_CORRECT, AnswerFields.RESPONSE_COUNT, AnswerFields.ID)
+
+
+def _view(answers: List[Dict]) -> List[tuple]:
+    return [tuple(answer.get(field) for field in COMPARED_FIELDS) for answer in answers]
+
+
+def replay_question(merger: AnswerMerger, answers: List[Dict], rounds: int, rng: random.Random) -> Dict:
+    """Answers arrive in batches; after each run the merged list is written back (sometimes reordered by ranking)"""
+    cuts = sorted(rng.sample(range(1, len(answers)), min(rounds, len(answers)) - 1)) + [len(answers)]
+    current = []
+    state = None
+    previous = 0
+    for run, cut in enumerate(cuts):
+        current = current + [dict(answer) for answer in answers[previous:cut]]
+        previous = cut
+
+        full, full_merged = merger.merge_similar_answers([dict(answer) for answer in current])
+        incremental, incremental_merged, state = merger.merge_incremental([dict(answer) for answer in current], state)
+        if _view(full) != _view(incremental) or full_merged != incremental_merged:
+            return {"run": run, "answers": len(current), "full": _view(full), "incremental": _view(incremental)}
+
+        # Written back: ranked questions come back sorted by response count
+        current = dense_rank_by_count(incremental) if rng.random() < 0.5 else incremental
+    return {}
+
+
+def synthetic_answers(rng: random.Random, count: int) -> List[Dict]:
+    """Short answers with typo variants, so clusters form and merges hand clusters other members' text"""
+    words = ["paris", "london", "berlin", "madrid", "lisbon", "vienna", "prague", "dublin"]
+    answers = []
+    for i in range(count):
+        text = rng.choice(words)
+        if rng.random() < 0.4:
+            cut = rng.randrange(len(text))
+            text = text[:cut] + rng.choice("aeiouy") + text[cut + 1:]
+        answers.append({
+            AnswerFields.ID: f"answer-{i}",
+            AnswerFields.ANSWER: text,
+            AnswerFields.IS_CORRECT: rng.random() < 0.3,
+            AnswerFields.RESPONSE_COUNT: rng.randint(1, 9),
+            AnswerFields.RANK: 0,
+            AnswerFields.SCORE: 0
+        })
+    return answers
+
+
+def main() -> bool:
+    """Replay live questions, a saved JSON export or synthetic answers; fails on the first mismatch"""
+    parser = argparse.ArgumentParser(description="Check that incremental merging equals a full re-merge")
+    parser.add_argument("--input", help="JSON file with a list of questions (or {\"data\": [...]}) instead of the API")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Replay N synthetic questions instead")
+    parser.add_argument("--rounds", type=int, default=5, help="Runs each question's answers are spread over")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    start_time = time.time()
+    rng = random.Random(args.seed)
+    merger = AnswerMerger(Config.SIMILARITY_THRESHOLD)
+
+    try:
+        if args.synthetic:
+            answer_lists = [(f"synthetic-{i}", synthetic_answers(rng, rng.randint(2, 40))) for i in range(args.synthetic)]
+        else:
+            if args.input:
+                with open(args.input, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                questions = data.get('data', []) if isinstance(data, dict) else data
+            else:
+                Config.validate()
+                questions = DatabaseHandler().fetch_all_questions()
+            answer_lists = [(QuestionFormatter.get_question_id(question), question[QuestionFields.ANSWERS])
+                            for question in questions if len(question.get(QuestionFields.ANSWERS) or []) > 1]
+
+        for question_id, answers in answer_lists:
+            mismatch = replay_question(merger, answers, max(1, args.rounds), rng)
+            if mismatch:
+                logger.error(f"❌ Question {question_id}: incremental merge differs from a full re-merge "
+                             f"on run {mismatch['run']} ({mismatch['answers']} answers)")
+                print(json.dumps(mismatch, indent=2, ensure_ascii=False, default=str))
+                return False
+    except Exception as e:
+        logger.error(f"❌ Incremental merge check failed: {str(e)}")
+        return False
+
+    print(f"✅ {len(answer_lists)} questions replayed over {args.rounds} runs each: incremental merging matched "
+          f"a full re-merge every time ({round(time.time() - start_time, 2)}s)")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
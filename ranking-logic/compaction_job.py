@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compaction Job - Merge near-duplicate answers in oversized questions, once or on a schedule
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict
+
+from config.settings import Config
+from database.db_handler import DatabaseHandler
+from services.compaction_service import CompactionService
+from utils.logger import setup_logger
+
+
+def print_report(report: Dict) -> None:
+    """Print the summary of one compaction run"""
+    print("\n" + "=" * 70)
+    print(f"🗜️  ANSWER COMPACTION {'(DRY RUN) ' if report['dry_run'] else ''}COMPLETED")
+    print("=" * 70)
+    print(f"⏱️  Processing Time: {report['processing_time']}s")
+    print(f"📝 Questions Scanned: {report['questions_scanned']} ({report['bytes_scanned']} bytes)")
+    print(f"📏 Over {report['min_bytes']} bytes: {report['questions_over_threshold']}")
+    print(f"✅ Questions Compacted: {report['questions_compacted']} in {report['batches']} batches")
+    print(f"🔗 Answers Removed: {report['answers_removed']}")
+    print(f"💾 Bytes Saved: {report['bytes_saved']} ({report['bytes_before']} → {report['bytes_after']})")
+    print(f"❌ Failed Updates: {report['failed_count']}")
+    print("=" * 70)
+
+
+def main() -> bool:
+    """Run compaction once, or every --interval seconds with --schedule"""
+    parser = argparse.ArgumentParser(description="Compact stored answer sets by merging similar spellings")
+    parser.add_argument("--schedule", action="store_true", help="Keep running every --interval seconds")
+    parser.add_argument("--interval", type=int, default=Config.COMPACTION_INTERVAL_SECONDS)
+    parser.add_argument("--min-bytes", type=int, default=Config.COMPACTION_MIN_BYTES,
+                        help="Only compact questions whose stored document is at least this large")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be saved without writing")
+    parser.add_argument("--output", help="Append each run's JSON report to this file")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    try:
+        Config.validate()
+        service = CompactionService(DatabaseHandler(), min_bytes=args.min_bytes)
+    except Exception as e:
+        logger.error(f"❌ Compaction setup failed: {str(e)}")
+        return False
+
+    while True:
+        try:
+            report = service.compact(dry_run=args.dry_run)
+            print_report(report)
+            if args.output:
+                with open(args.output, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({"ts": time.time(), **report}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"❌ Compaction run failed: {str(e)}")
+            if not args.schedule:
+                return False
+
+        if not args.schedule:
+            return True
+        logger.info(f"Next compaction in {args.interval}s")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -5,7 +5,7 @@ Refactored Configuration Settings - Clean and centralized
 import os
 from typing import List
 from dotenv import load_dotenv
-from constants import Defaults, ErrorMessages
+from constants import Defaults, ErrorMessages, SimilarityModes
 
 load_dotenv()
 
@@ -32,6 +32,27 @@ class ConfigValidator:
         if config_class.SIMILARITY_THRESHOLD < 0 or config_class.SIMILARITY_THRESHOLD > 1:
             raise ValueError("SIMILARITY_THRESHOLD must be between 0 and 1")
         
+        if config_class.SIMILARITY_MODE not in (SimilarityModes.EXACT, SimilarityModes.MINHASH):
+            raise ValueError("SIMILARITY_MODE must be 'exact' or 'minhash'")
+        
+        if config_class.MINHASH_BANDS < 1 or config_class.MINHASH_NUM_PERM % config_class.MINHASH_BANDS != 0:
+            raise ValueError("MINHASH_NUM_PERM must be a positive multiple of MINHASH_BANDS")
+        
+        if config_class.MAX_FUZZY_ANSWER_LENGTH < 0 or config_class.MERGE_CELL_BUDGET < 0 or config_class.MERGE_TIME_LIMIT_SECONDS < 0:
+            raise ValueError("MAX_FUZZY_ANSWER_LENGTH, MERGE_CELL_BUDGET and MERGE_TIME_LIMIT_SECONDS must not be negative")
+        
+        if config_class.COMPACTION_BATCH_SIZE < 1 or config_class.COMPACTION_INTERVAL_SECONDS < 1:
+            raise ValueError("COMPACTION_BATCH_SIZE and COMPACTION_INTERVAL_SECONDS must be positive")
+        
+        if config_class.DUPLICATE_QUESTION_THRESHOLD <= 0 or config_class.DUPLICATE_QUESTION_THRESHOLD > 1:
+            raise ValueError("DUPLICATE_QUESTION_THRESHOLD must be greater than 0 and at most 1")
+        
+        if config_class.PIPELINE_QUEUE_SIZE < 1:
+            raise ValueError("PIPELINE_QUEUE_SIZE must be positive")
+        
+        if config_class.LOCAL_STORE_MAX_AGE_SECONDS < 0:
+            raise ValueError("LOCAL_STORE_MAX_AGE_SECONDS must not be negative")
+        
         if config_class.FLASK_PORT < 1 or config_class.FLASK_PORT > 65535:
             raise ValueError("FLASK_PORT must be between 1 and 65535")
 
@@ -48,6 +69,36 @@ class Config:
     SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', str(Defaults.SIMILARITY_THRESHOLD)))
     SCORING_VALUES = Defaults.SCORING_VALUES  # Top 5 ranks get these scores
     
+    # Approximate similarity for long free-text answers
+    SIMILARITY_MODE = os.getenv('SIMILARITY_MODE', Defaults.SIMILARITY_MODE).lower()
+    MINHASH_NUM_PERM = int(os.getenv('MINHASH_NUM_PERM', str(Defaults.MINHASH_NUM_PERM)))
+    MINHASH_BANDS = int(os.getenv('MINHASH_BANDS', str(Defaults.MINHASH_BANDS)))
+    MINHASH_SHINGLE_SIZE = int(os.getenv('MINHASH_SHINGLE_SIZE', str(Defaults.MINHASH_SHINGLE_SIZE)))
+    
+    # Merge guardrails per question (0 disables each): longer answers and work past a limit
+    # fall back to whitespace-insensitive equality
+    MAX_FUZZY_ANSWER_LENGTH = int(os.getenv('MAX_FUZZY_ANSWER_LENGTH', str(Defaults.MAX_FUZZY_ANSWER_LENGTH)))
+    MERGE_CELL_BUDGET = int(os.getenv('MERGE_CELL_BUDGET', str(Defaults.MERGE_CELL_BUDGET)))
+    MERGE_TIME_LIMIT_SECONDS = float(os.getenv('MERGE_TIME_LIMIT_SECONDS', str(Defaults.MERGE_TIME_LIMIT_SECONDS)))
+    
+    # Incremental merging: per-question clusters persisted here between runs (empty disables)
+    CLUSTER_STATE_PATH = os.getenv('CLUSTER_STATE_PATH', Defaults.CLUSTER_STATE_PATH)
+    
+    # Live answer matching: per-question indexes are re-synced once they are this old
+    MATCH_INDEX_REFRESH_SECONDS = int(os.getenv('MATCH_INDEX_REFRESH_SECONDS', str(Defaults.MATCH_INDEX_REFRESH_SECONDS)))
+    
+    # Answer-set compaction: questions at least this large are merged and written back in batches
+    COMPACTION_MIN_BYTES = int(os.getenv('COMPACTION_MIN_BYTES', str(Defaults.COMPACTION_MIN_BYTES)))
+    COMPACTION_BATCH_SIZE = int(os.getenv('COMPACTION_BATCH_SIZE', str(Defaults.COMPACTION_BATCH_SIZE)))
+    COMPACTION_INTERVAL_SECONDS = int(os.getenv('COMPACTION_INTERVAL_SECONDS', str(Defaults.COMPACTION_INTERVAL_SECONDS)))
+    
+    # Near-duplicate question detection: TF-IDF cosine similarity at which two questions are reported
+    DUPLICATE_QUESTION_THRESHOLD = float(os.getenv('DUPLICATE_QUESTION_THRESHOLD', str(Defaults.DUPLICATE_QUESTION_THRESHOLD)))
+    
+    # Local SQLite snapshot of questions and ranking results (empty disables it); reads fall back to the API when older
+    LOCAL_STORE_PATH = os.getenv('LOCAL_STORE_PATH', Defaults.LOCAL_STORE_PATH)
+    LOCAL_STORE_MAX_AGE_SECONDS = int(os.getenv('LOCAL_STORE_MAX_AGE_SECONDS', str(Defaults.LOCAL_STORE_MAX_AGE_SECONDS)))
+    
     # Application Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', Defaults.LOG_LEVEL)
     FLASK_PORT = int(os.getenv('FLASK_PORT', str(Defaults.FLASK_PORT)))
@@ -56,6 +107,9 @@ class Config:
     # Bulk update configuration
     BULK_UPDATE_CHUNK_SIZE = int(os.getenv("BULK_UPDATE_CHUNK_SIZE", "10"))
     
+    # Staged pipeline: items each inter-stage queue holds before the upstream stage blocks
+    PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', str(Defaults.PIPELINE_QUEUE_SIZE)))
+    
     # Import field constants for backward compatibility
     from constants import QuestionFields, AnswerFields
     
@@ -92,6 +146,24 @@ class Config:
         """Check if debug mode is enabled"""
         return cls.FLASK_DEBUG
     
+    @classmethod
+    def get_minhash_params(cls) -> dict:
+        """Get MinHash/LSH parameters for approximate similarity mode"""
+        return {
+            "num_perm": cls.MINHASH_NUM_PERM,
+            "bands": cls.MINHASH_BANDS,
+            "shingle_size": cls.MINHASH_SHINGLE_SIZE
+        }
+    
+    @classmethod
+    def get_merge_guardrails(cls) -> dict:
+        """Get per-question limits for fuzzy answer merging"""
+        return {
+            "max_answer_length": cls.MAX_FUZZY_ANSWER_LENGTH,
+            "cell_budget": cls.MERGE_CELL_BUDGET,
+            "time_limit": cls.MERGE_TIME_LIMIT_SECONDS
+        }
+    
     @classmethod
     def get_scoring_values(cls) -> List[int]:
         """Get scoring values for ranking"""
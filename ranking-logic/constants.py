@@ -47,6 +47,22 @@ class Defaults:
     TIMEOUT = 30
     SIMILARITY_THRESHOLD = 0.75
     SCORING_VALUES = [100, 80, 60, 40, 20]
+    SIMILARITY_MODE = 'exact'
+    MINHASH_NUM_PERM = 128
+    MINHASH_BANDS = 32
+    MINHASH_SHINGLE_SIZE = 3
+    CLUSTER_STATE_PATH = ''
+    MATCH_INDEX_REFRESH_SECONDS = 60
+    COMPACTION_MIN_BYTES = 8192
+    COMPACTION_BATCH_SIZE = 50
+    COMPACTION_INTERVAL_SECONDS = 3600
+    MAX_FUZZY_ANSWER_LENGTH = 0     # merge guardrails are opt-in; 0 disables each
+    MERGE_CELL_BUDGET = 0
+    MERGE_TIME_LIMIT_SECONDS = 0.0
+    DUPLICATE_QUESTION_THRESHOLD = 0.85
+    PIPELINE_QUEUE_SIZE = 64
+    LOCAL_STORE_PATH = ''
+    LOCAL_STORE_MAX_AGE_SECONDS = 300
     FLASK_PORT = 5000
     LOG_LEVEL = 'INFO'
     
@@ -57,6 +73,11 @@ class Defaults:
     RANK = 0
     SCORE = 0
 
+# Similarity Modes
+class SimilarityModes:
+    EXACT = 'exact'        # Levenshtein against every later answer
+    MINHASH = 'minhash'    # MinHash/LSH candidates, verified with Levenshtein
+
 # Log Messages
 class LogMessages:
     # Connection
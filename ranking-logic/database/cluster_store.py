@@ -0,0 +1,89 @@
+"""
+Persisted per-question answer cluster state for incremental similarity merging
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, Optional
+
+logger = logging.getLogger('survey_analytics')
+
+STATE_VERSION = 1
+
+
+class ClusterStateStore:
+    """JSON file holding each question's answer clusters between merge runs"""
+
+    def __init__(self, path: str, similarity_threshold: float):
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self._questions = None
+        self._dirty = False
+
+    def load(self) -> Dict[str, Dict]:
+        """Load stored clusters; state written with another threshold is discarded"""
+        if self._questions is not None:
+            return self._questions
+
+        self._questions = {}
+        if not self.path or not os.path.exists(self.path):
+            return self._questions
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable cluster state {self.path}: {str(e)}")
+            return self._questions
+
+        if data.get('version') != STATE_VERSION or data.get('similarity_threshold') != self.similarity_threshold:
+            logger.info("Cluster state was built with different settings - rebuilding from scratch")
+            return self._questions
+
+        self._questions = data.get('questions', {})
+        logger.info(f"Loaded cluster state for {len(self._questions)} questions")
+        return self._questions
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        """Stored state for one question, or None if it was never clustered"""
+        return self.load().get(str(question_id))
+
+    def put(self, question_id: str, state: Dict) -> None:
+        """Replace one question's state; written on the next save()"""
+        self.load()[str(question_id)] = state
+        self._dirty = True
+
+    def remove(self, question_id: str) -> None:
+        """Forget one question so its next run re-clusters from scratch"""
+        if self.load().pop(str(question_id), None) is not None:
+            self._dirty = True
+
+    def save(self) -> bool:
+        """Write the state atomically if anything changed"""
+        if not self._dirty or not self.path:
+            return False
+
+        payload = {
+            'version': STATE_VERSION,
+            'similarity_threshold': self.similarity_threshold,
+            'questions': self._questions
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write next to the target and rename, so a crash never leaves half a file
+        fd, tmp_path = tempfile.mkstemp(prefix='.cluster_state_', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._dirty = False
+        logger.debug(f"Saved cluster state for {len(self._questions)} questions to {self.path}")
+        return True
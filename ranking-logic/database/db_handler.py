@@ -8,9 +8,11 @@ import json
 from typing import List, Dict, Optional
 from constants import APIKeys, QuestionFields
 from utils.data_formatters import QuestionFormatter  # keep QuestionFormatter
+from utils.schema_validator import question_validator
 from utils.response_processor import ResponseProcessor  # import ResponseProcessor here
 from utils.api_handler import APIHandler
 from config.settings import Config  # ensure this exists
+from database.local_store import LocalQuestionStore
 
 logger = logging.getLogger('survey_analytics')
 
@@ -25,6 +27,8 @@ class DatabaseHandler:
             endpoint=Config.API_ENDPOINT
         )
         self.last_operation_details = {}
+        # Optional SQLite snapshot of the collection; local reads fall back to the API when it is stale
+        self.local_store = LocalQuestionStore(Config.LOCAL_STORE_PATH) if Config.LOCAL_STORE_PATH else None
     
     def test_connection(self) -> bool:
         """Test if API connection is healthy"""
@@ -123,6 +127,40 @@ class DatabaseHandler:
     
     def fetch_all_questions(self) -> List[Dict]:
         """Fetch all questions from API endpoint with clean logging"""
+        questions = self._process_fetched_questions(self.fetch_raw_questions())
+        if self.local_store is not None:
+            self.local_store.refresh(questions)
+        return questions
+    
+    def _local_store_is_fresh(self) -> bool:
+        """True when the local snapshot may be read instead of the API"""
+        if self.local_store is None:
+            return False
+        age = self.local_store.age()
+        return age is not None and age <= Config.LOCAL_STORE_MAX_AGE_SECONDS
+    
+    def load_questions(self) -> List[Dict]:
+        """All questions from the local snapshot while it is fresh, otherwise from the API"""
+        if self._local_store_is_fresh():
+            return self.local_store.all_questions()
+        return self.fetch_all_questions()
+    
+    def get_question_counts(self) -> Dict:
+        """Question totals by type, counted locally when a snapshot is available"""
+        if self.local_store is not None:
+            if not self._local_store_is_fresh():
+                self.fetch_all_questions()
+            return self.local_store.counts()
+        questions = self.fetch_all_questions()
+        return {
+            "total_questions": len(questions),
+            "questions_with_answers": sum(1 for q in questions if q.get(QuestionFields.ANSWERS)),
+            "input_questions": sum(1 for q in questions if (q.get(QuestionFields.QUESTION_TYPE) or '').lower() == 'input'),
+            "mcq_questions": sum(1 for q in questions if (q.get(QuestionFields.QUESTION_TYPE) or '').lower() == 'mcq')
+        }
+    
+    def fetch_raw_questions(self) -> List[Dict]:
+        """Fetch all questions as the API returns them, before compatibility processing"""
         try:
             logger.info("📥 Fetching questions from API...")
             
@@ -164,9 +202,7 @@ class DatabaseHandler:
                     for issue in analysis["data_issues"][:3]:
                         logger.debug(f"   • {issue}")
             
-            # Process questions for internal use
-            processed_questions = self._process_fetched_questions(questions)
-            return processed_questions
+            return questions
             
         except Exception as e:
             # Check if this is actually a 404 that should be treated as empty database
@@ -207,6 +243,13 @@ class DatabaseHandler:
             for issue in processing_issues[:3]:  # Show first 3
                 logger.warning(f"  • {issue}")
         
+        # Report schema problems at ingestion; the pipeline checks again before writing
+        validation = question_validator.validate_many(processed_questions)
+        if validation["invalid"]:
+            logger.debug(f"{validation['invalid']} of {validation['total']} questions fail schema validation")
+            for question_id, errors in list(validation["errors"].items())[:3]:
+                logger.debug(f"   • {question_id}: {errors[0]['path']} {errors[0]['error']}")
+        
         return processed_questions
     
     def bulk_update_questions(self, questions: List[Dict]) -> Dict:
@@ -274,101 +317,6 @@ class DatabaseHandler:
 
         return {"updated": updated, "total": total, "chunks": chunks, "failed_chunks": failed_chunks}
 
-    def update_question_answers(self, question_id: str, answers: List[Dict]) -> bool:
-        """
-        Update a single question's answers (used as fallback when payload too large).
-        """
-        formatted = [QuestionFormatter.format_for_api({QuestionFields.ANSWERS: answers, QuestionFields.QUESTION_ID: question_id})]
-        payload = {APIKeys.QUESTIONS: formatted}
-        resp = self.api.put(json=payload)
-        return getattr(resp, "ok", True)
-    
-    def update_question_answers(self, question_id: str, answers: List[Dict]) -> bool:
-        """Update answers for a specific question via API"""
-        try:
-            logger.info(f"📤 Updating question {question_id} with {len(answers)} answers")
-            
-            target_question = self._find_question_by_id(question_id)
-            if not target_question:
-                logger.error(f"❌ Question {question_id} not found")
-                return False
-            
-            # Validate answers before update
-            validation_result = self._validate_answers_for_update(answers, question_id)
-            if not validation_result["valid"]:
-                logger.error(f"❌ Answer validation failed for question {question_id}:")
-                for error in validation_result["errors"][:3]:
-                    logger.error(f"  • {error}")
-                return False
-            
-            # Update the question with new answers
-            target_question[Config.QuestionFields.ANSWERS] = answers
-            
-            # Format for API submission
-            update_data = self._build_single_question_payload(target_question)
-            
-            logger.debug(f"Updating question {question_id} with validated data")
-            
-            # Make API request
-            response = self.api.make_request("PUT", update_data)
-            
-            # Check if update was successful
-            if ResponseProcessor.is_success_response(response):
-                logger.info(f"✅ Successfully updated question {question_id}")
-                return True
-            else:
-                error_msg = response.get(APIKeys.MESSAGE, str(response))
-                logger.error(f"❌ Update failed for question {question_id}: {error_msg}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ Exception updating question {question_id}: {str(e)}")
-            return False
-    
-    def _validate_answers_for_update(self, answers: List[Dict], question_id: str) -> Dict:
-        """Validate answers before update"""
-        errors = []
-        
-        if not answers:
-            errors.append("No answers provided")
-            return {"valid": False, "errors": errors}
-        
-        for i, answer in enumerate(answers):
-            if not isinstance(answer, dict):
-                errors.append(f"Answer {i}: Must be a dictionary")
-                continue
-            
-            # Check required fields
-            if 'answer' not in answer:
-                errors.append(f"Answer {i}: Missing 'answer' field")
-            if 'isCorrect' not in answer:
-                errors.append(f"Answer {i}: Missing 'isCorrect' field")
-            
-            # Check data types
-            if 'isCorrect' in answer and not isinstance(answer['isCorrect'], bool):
-                errors.append(f"Answer {i}: 'isCorrect' must be boolean, got {type(answer['isCorrect'])}")
-            
-            if 'responseCount' in answer and not isinstance(answer['responseCount'], (int, float)):
-                errors.append(f"Answer {i}: 'responseCount' must be number, got {type(answer['responseCount'])}")
-        
-        return {"valid": len(errors) == 0, "errors": errors}
-    
-    def _find_question_by_id(self, question_id: str) -> Dict:
-        """Find question by ID from API"""
-        questions = self.fetch_all_questions()
-        
-        for question in questions:
-            if (question.get('_id') == question_id or 
-                question.get('questionID') == question_id):
-                return question
-        
-        return None
-    
-    def _build_single_question_payload(self, question: Dict) -> Dict:
-        """Build API payload for single question update"""
-        formatted_question = QuestionFormatter.format_for_api(question)
-        return {APIKeys.QUESTIONS: [formatted_question]}
-    
     def bulk_update_questions(self, questions: List[Dict]) -> Dict:
         """
         Send updates in chunks to avoid HTTP 413 (PayloadTooLarge).
@@ -403,6 +351,7 @@ class DatabaseHandler:
 
             if result == "ok":
                 updated += len(window)
+                self._record_written(window)
                 idx += len(window)
                 chunks += 1
                 continue
@@ -417,6 +366,7 @@ class DatabaseHandler:
                 resp = self.api.put(json=payload)
                 if getattr(resp, "ok", True):
                     updated += 1
+                    self._record_written([q])
                 else:
                     failed_chunks += 1
             idx += len(window)
@@ -424,14 +374,34 @@ class DatabaseHandler:
 
         return {"updated": updated, "total": total, "chunks": chunks, "failed_chunks": failed_chunks}
 
+    def _record_written(self, questions: List[Dict]) -> None:
+        """Keep the local snapshot in step with what the API accepted"""
+        if self.local_store is not None:
+            self.local_store.record_ranked(questions)
+
+    def _find_question_by_id(self, question_id: str) -> Optional[Dict]:
+        """Find question by ID in the local snapshot while it is fresh; never downloads the collection"""
+        if not self._local_store_is_fresh():
+            return None
+        return self.local_store.get(question_id)
+    
     def update_question_answers(self, question_id: str, answers: List[Dict]) -> bool:
         """
         Update a single question's answers (used as fallback when payload too large).
+        Sends the whole stored question when the local snapshot has it, otherwise only id and answers.
         """
-        formatted = [QuestionFormatter.format_for_api({QuestionFields.ANSWERS: answers, QuestionFields.QUESTION_ID: question_id})]
-        payload = {APIKeys.QUESTIONS: formatted}
+        question = self._find_question_by_id(question_id)
+        stored = question is not None
+        if not stored:
+            question = {QuestionFields.QUESTION_ID: question_id}
+        question[QuestionFields.ANSWERS] = answers
+        
+        payload = {APIKeys.QUESTIONS: [QuestionFormatter.format_for_api(question)]}
         resp = self.api.put(json=payload)
-        return getattr(resp, "ok", True)
+        ok = getattr(resp, "ok", True)
+        if ok and stored:
+            self._record_written([question])
+        return ok
     
     def get_diagnostic_summary(self) -> Dict:
         """Get comprehensive diagnostic information"""
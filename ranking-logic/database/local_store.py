@@ -0,0 +1,183 @@
+"""
+Local materialized store of fetched and ranked questions (SQLite)
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from constants import AnswerFields, QuestionFields
+from utils.data_formatters import QuestionFormatter
+
+logger = logging.getLogger('survey_analytics')
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    question_id     TEXT PRIMARY KEY,
+    mongo_id        TEXT,
+    question_type   TEXT,
+    answer_count    INTEGER NOT NULL,
+    correct_answers INTEGER NOT NULL,
+    content_hash    TEXT NOT NULL,
+    document        TEXT NOT NULL,
+    fetched_at      REAL NOT NULL,
+    ranked_at       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_mongo_id ON questions (mongo_id);
+CREATE INDEX IF NOT EXISTS idx_questions_type_correct ON questions (question_type, correct_answers);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class LocalQuestionStore:
+    """Last fetched snapshot of the question collection plus ranking results, in one SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Shared by the Flask worker threads; every statement runs under the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            version = self._get_meta('schema_version')
+            if version is not None and int(version) != SCHEMA_VERSION:
+                logger.info("Local store schema changed - discarding the old snapshot")
+                self._conn.execute("DELETE FROM questions")
+                self._conn.execute("DELETE FROM meta")
+            self._set_meta('schema_version', SCHEMA_VERSION)
+
+    def refresh(self, questions: List[Dict]) -> Dict:
+        """Sync the snapshot with a fresh fetch; only new or changed questions are rewritten"""
+        start = time.perf_counter()
+        now = time.time()
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+        with self._lock, self._conn:
+            known = dict(self._conn.execute("SELECT question_id, content_hash FROM questions").fetchall())
+            seen = set()
+            rows = []
+            for question in questions:
+                row = self._row(question, now)
+                if row is None or row[0] in seen:
+                    continue
+                seen.add(row[0])
+                previous = known.get(row[0])
+                if previous == row[5]:
+                    stats["unchanged"] += 1
+                    continue
+                stats["added" if previous is None else "updated"] += 1
+                rows.append(row)
+
+            self._upsert(rows)
+            removed = [(question_id,) for question_id in known if question_id not in seen]
+            self._conn.executemany("DELETE FROM questions WHERE question_id = ?", removed)
+            stats["removed"] = len(removed)
+            self._set_meta('refreshed_at', now)
+
+        logger.info(f"💽 Local store refreshed in {time.perf_counter() - start:.3f}s: {stats['added']} added, "
+                    f"{stats['updated']} updated, {stats['removed']} removed, {stats['unchanged']} unchanged")
+        return stats
+
+    def record_ranked(self, questions: List[Dict]) -> int:
+        """Store questions the API accepted after ranking, so local reads see the new ranks and scores"""
+        now = time.time()
+        rows = [row for row in (self._row(question, now, ranked_at=now) for question in questions) if row]
+        with self._lock, self._conn:
+            self._upsert(rows)
+        return len(rows)
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last refresh, or None if the store was never filled"""
+        with self._lock:
+            refreshed_at = self._get_meta('refreshed_at')
+        return None if refreshed_at is None else time.time() - float(refreshed_at)
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        """One question by questionID or Mongo _id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document FROM questions WHERE question_id = ? OR mongo_id = ? LIMIT 1",
+                (str(question_id), str(question_id))
+            ).fetchone()
+        return json.loads(row["document"]) if row else None
+
+    def all_questions(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT document FROM questions ORDER BY rowid").fetchall()
+        return [json.loads(row["document"]) for row in rows]
+
+    def counts(self, min_correct: int = 3) -> Dict:
+        """Question totals by type without loading any document"""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT COUNT(*) AS total,
+                          COALESCE(SUM(answer_count > 0), 0) AS with_answers,
+                          COALESCE(SUM(question_type = 'input'), 0) AS input,
+                          COALESCE(SUM(question_type = 'mcq'), 0) AS mcq,
+                          COALESCE(SUM(question_type = 'input' AND correct_answers >= ?), 0) AS final_ready,
+                          COALESCE(SUM(ranked_at IS NOT NULL), 0) AS ranked
+                   FROM questions""",
+                (min_correct,)
+            ).fetchone()
+        return {
+            "total_questions": row["total"],
+            "questions_with_answers": row["with_answers"],
+            "input_questions": row["input"],
+            "mcq_questions": row["mcq"],
+            "final_ready_questions": row["final_ready"],
+            "ranked_questions": row["ranked"]
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _upsert(self, rows: List[tuple]) -> None:
+        self._conn.executemany(
+            """INSERT INTO questions (question_id, mongo_id, question_type, answer_count, correct_answers,
+                                      content_hash, document, fetched_at, ranked_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(question_id) DO UPDATE SET
+                   mongo_id = excluded.mongo_id, question_type = excluded.question_type,
+                   answer_count = excluded.answer_count, correct_answers = excluded.correct_answers,
+                   content_hash = excluded.content_hash, document = excluded.document,
+                   fetched_at = excluded.fetched_at, ranked_at = COALESCE(excluded.ranked_at, questions.ranked_at)""",
+            rows
+        )
+
+    @staticmethod
+    def _row(question: Dict, now: float, ranked_at: float = None) -> Optional[tuple]:
+        question_id = QuestionFormatter.get_question_id(question)
+        if not question_id:
+            return None
+        encoded = json.dumps(question, sort_keys=True, ensure_ascii=False, default=str)
+        answers = question.get(QuestionFields.ANSWERS) or []
+        return (
+            str(question_id),
+            str(question[QuestionFields.ID]) if question.get(QuestionFields.ID) else None,
+            (question.get(QuestionFields.QUESTION_TYPE) or '').lower(),
+            len(answers),
+            sum(1 for answer in answers if isinstance(answer, dict) and answer.get(AnswerFields.IS_CORRECT)),
+            hashlib.sha1(encoded.encode('utf-8')).hexdigest(),
+            encoded,
+            now,
+            ranked_at
+        )
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Find Duplicate Questions - Report groups of near-duplicate questions across the collection
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict
+
+from config.settings import Config
+from database.db_handler import DatabaseHandler
+from services.question_dedup_service import QuestionDedupService
+from utils.logger import setup_logger
+
+
+def print_report(report: Dict, processing_time: float, limit: int) -> None:
+    """Print the largest duplicate groups"""
+    print("\n" + "=" * 70)
+    print("🔎 NEAR-DUPLICATE QUESTIONS")
+    print("=" * 70)
+    print(f"⏱️  Processing Time: {processing_time}s")
+    print(f"📝 Questions Scanned: {report['questions_scanned']}")
+    print(f"🔢 Candidates Checked: {report['candidates_checked']}")
+    print(f"🔗 Similar Pairs (cosine ≥ {report['threshold']}): {report['pairs']}")
+    print(f"📦 Duplicate Groups: {len(report['groups'])} ({report['duplicate_questions']} extra copies)")
+
+    for group in report['groups'][:limit]:
+        print()
+        print(f"  {group['total_responses']} responses split across {len(group['questions'])} questions:")
+        for row in group['questions']:
+            keep = " ◀ keep" if row is group['canonical'] else ""
+            print(f"    [{row['questionId']}] ({row['questionType']}, {row['responses']} responses) "
+                  f"{row['question'][:80]}{keep}")
+    if len(report['groups']) > limit:
+        print(f"\n  ... {len(report['groups']) - limit} more groups (use --output for all)")
+    print("=" * 70)
+
+
+def main() -> bool:
+    """Detect near-duplicates in live questions or a saved JSON export"""
+    parser = argparse.ArgumentParser(description="Report near-duplicate questions by TF-IDF cosine similarity")
+    parser.add_argument("--threshold", type=float, default=Config.DUPLICATE_QUESTION_THRESHOLD)
+    parser.add_argument("--any-type", action="store_true", help="Also compare questions of different types")
+    parser.add_argument("--input", help="JSON file with a list of questions (or {\"data\": [...]}) instead of the API")
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    parser.add_argument("--limit", type=int, default=20, help="Groups to print")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    start_time = time.time()
+
+    try:
+        if not 0 < args.threshold <= 1:
+            raise ValueError("--threshold must be greater than 0 and at most 1")
+        if args.input:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            questions = data.get('data', []) if isinstance(data, dict) else data
+            report = QuestionDedupService(threshold=args.threshold).find_duplicates(questions, args.any_type)
+        else:
+            Config.validate()
+            service = QuestionDedupService(DatabaseHandler(), threshold=args.threshold)
+            report = service.find_duplicates(any_type=args.any_type)
+    except Exception as e:
+        logger.error(f"❌ Duplicate question detection failed: {str(e)}")
+        return False
+
+    print_report(report, round(time.time() - start_time, 2), args.limit)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Wrote duplicate report to {args.output}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -3,12 +3,15 @@
 Updated Ranking Processor - Input questions only, no automatic final processing
 """
 
+import argparse
 import sys
 import time
 from typing import Dict
 from config.settings import Config
 from database.db_handler import DatabaseHandler
 from services.ranking_service import RankingService
+from services.pipeline_service import PipelineService
+from services.staged_pipeline import StagedPipelineService
 from utils.logger import setup_logger
 
 
@@ -38,6 +41,15 @@ class ProcessorDisplay:
         print(f"🏆 Answers Ranked: {result['answers_ranked']}")
         print(f"🎯 Answers Scored: {result['answers_scored']}")
         
+        if 'timings' in result:
+            print(f"🔗 Duplicates Merged: {result['duplicates_merged']} across {result['merged_questions']} questions")
+            print("⏱️  Stage Timings: " + ", ".join(f"{stage} {seconds}s" for stage, seconds in result['timings'].items()))
+            if result.get('limited_questions'):
+                print(f"🚧 Merge Guardrails Hit: {len(result['limited_questions'])} questions")
+            if 'utilization' in result:
+                print("📈 Stage Utilization: " + ", ".join(
+                    f"{stage} {int(row['utilization'] * 100)}%" for stage, row in result['utilization'].items()))
+        
         ProcessorDisplay._print_warnings_and_success(result)
         
         print("=" * 70)
@@ -98,8 +110,10 @@ class ProcessorValidator:
 class RankingProcessor:
     """Main processor class that orchestrates the ranking process"""
     
-    def __init__(self):
+    def __init__(self, pipeline: bool = False, staged: bool = False):
         self.logger = setup_logger()
+        self.pipeline = pipeline
+        self.staged = staged
         self.db_handler = None
         self.ranking_service = None
     
@@ -108,7 +122,14 @@ class RankingProcessor:
         try:
             self.logger.info("🔧 Initializing services...")
             self.db_handler = DatabaseHandler()
-            self.ranking_service = RankingService(self.db_handler)
+            # Pipeline mode merges similar answers first, sharing one fetch and one update
+            # Staged mode runs the same pipeline with overlapping stages
+            if self.staged:
+                self.ranking_service = StagedPipelineService(self.db_handler)
+            elif self.pipeline:
+                self.ranking_service = PipelineService(self.db_handler)
+            else:
+                self.ranking_service = RankingService(self.db_handler)
             return True
         except Exception as e:
             self.logger.error(f"❌ Service initialization failed: {str(e)}")
@@ -174,7 +195,14 @@ class RankingProcessor:
 
 def main() -> bool:
     """Main function, entry point for ranking processor"""
-    processor = RankingProcessor()
+    parser = argparse.ArgumentParser(description="Rank survey answers for Input questions")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Merge similar answers and rank in one fetch/update cycle")
+    parser.add_argument("--staged", action="store_true",
+                        help="Like --pipeline, but stages run concurrently and writes start early")
+    args = parser.parse_args()
+    
+    processor = RankingProcessor(pipeline=args.pipeline, staged=args.staged)
     return processor.run()
 
 
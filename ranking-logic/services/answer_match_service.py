@@ -0,0 +1,280 @@
+"""
+Answer Match Service - Per-question n-gram indexes for matching live answers
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import List, Dict, Optional, Set
+
+from config.settings import Config
+from constants import AnswerFields, QuestionFields
+from services.similarity_service import AnswerMerger, SimilarityCalculator
+from utils.data_formatters import QuestionFormatter
+
+logger = logging.getLogger('survey_analytics')
+
+PAD = '\x00'
+
+
+class AnswerMatchIndex:
+    """Known answers of one question, indexed by character n-grams for bounded edit-distance lookups"""
+
+    def __init__(self, similarity_threshold: float, gram_size: int = 2):
+        self.similarity_threshold = similarity_threshold
+        self.gram_size = gram_size
+        self._entries = {}                    # answer key -> entry
+        self._postings = defaultdict(set)     # gram -> answer keys
+        self._by_length = defaultdict(set)    # normalized length -> answer keys
+        self._by_text = defaultdict(set)      # normalized text -> answer keys
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def grams(self, normalized: str) -> Set[str]:
+        """Distinct padded n-grams; one edit changes at most gram_size of them"""
+        padding = PAD * (self.gram_size - 1)
+        padded = padding + normalized + padding
+        return {padded[i:i + self.gram_size] for i in range(len(padded) - self.gram_size + 1)}
+
+    def copy(self) -> 'AnswerMatchIndex':
+        """Independent copy, so a refresh can sync it while the original keeps serving lookups"""
+        clone = AnswerMatchIndex(self.similarity_threshold, self.gram_size)
+        clone._entries = {key: dict(entry) for key, entry in self._entries.items()}
+        for mapping, source in ((clone._postings, self._postings), (clone._by_length, self._by_length),
+                                (clone._by_text, self._by_text)):
+            for bucket, keys in source.items():
+                mapping[bucket] = set(keys)
+        return clone
+
+    def sync(self, answers: List[Dict]) -> Dict:
+        """Bring the index in line with the current answers; only added or edited texts are re-indexed"""
+        current = {}
+        for answer in answers:
+            current[AnswerMerger.answer_key(answer)] = answer
+
+        removed = [key for key in self._entries if key not in current]
+        for key in removed:
+            self._remove(key)
+
+        added = updated = 0
+        for key, answer in current.items():
+            entry = self._entries.get(key)
+            text = answer.get(AnswerFields.ANSWER) or ''
+            if entry is None:
+                self._add(key, answer)
+                added += 1
+            elif entry['text'] != text:
+                self._remove(key)
+                self._add(key, answer)
+                updated += 1
+            else:
+                # Rank, score and counts change every ranking run; the grams do not
+                entry['answer'] = answer
+
+        return {"added": added, "updated": updated, "removed": len(removed)}
+
+    def match(self, text: str) -> Optional[Dict]:
+        """Best known answer whose similarity reaches the threshold, or None"""
+        if not text or not self._entries:
+            return None
+        normalized = text.lower().strip()
+        if not normalized:
+            return None
+
+        exact = self._by_text.get(normalized)
+        if exact:
+            return self._result(max((self._entries[key] for key in exact), key=self._rank_key), 1.0)
+
+        best = None
+        best_similarity = -1.0
+        # Most shared grams first, so a good match is found early and tightens every later budget
+        for _, entry in sorted(self._candidates(normalized), key=lambda item: -item[0]):
+            max_length = max(len(normalized), entry['length'])
+            budget = SimilarityCalculator.distance_budget(max_length, max(self.similarity_threshold, best_similarity))
+            distance = SimilarityCalculator.bounded_levenshtein_distance(normalized, entry['normalized'], budget)
+            if distance > budget:
+                continue
+            similarity = max(0, 1 - (distance / max_length))
+            if similarity > best_similarity or (
+                    similarity == best_similarity and self._rank_key(entry) > self._rank_key(best)):
+                best, best_similarity = entry, similarity
+
+        return self._result(best, best_similarity) if best is not None else None
+
+    def _candidates(self, normalized: str) -> List[tuple]:
+        """(shared grams, entry) for entries that survive the length and shared-gram filters"""
+        length = len(normalized)
+        query_grams = self.grams(normalized)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for key in self._postings.get(gram, ()):
+                shared[key] += 1
+
+        candidates = []
+        for other_length, keys in self._by_length.items():
+            max_length = max(length, other_length)
+            budget = SimilarityCalculator.distance_budget(max_length, self.similarity_threshold)
+            if budget < 0 or abs(length - other_length) > budget:
+                continue
+            allowance = self.gram_size * budget
+            if len(query_grams) <= allowance:
+                # Short strings may match without sharing a single gram; check the whole length bucket
+                candidates.extend((shared.get(key, 0), self._entries[key]) for key in keys)
+                continue
+            for key in keys:
+                entry = self._entries[key]
+                if shared.get(key, 0) >= max(len(query_grams), entry['gram_count']) - allowance:
+                    candidates.append((shared[key], entry))
+        return candidates
+
+    def _add(self, key: str, answer: Dict) -> None:
+        text = answer.get(AnswerFields.ANSWER) or ''
+        normalized = text.lower().strip()
+        grams = self.grams(normalized)
+        self._entries[key] = {
+            'key': key,
+            'answer': answer,
+            'text': text,
+            'normalized': normalized,
+            'length': len(normalized),
+            'grams': grams,
+            'gram_count': len(grams)
+        }
+        for gram in grams:
+            self._postings[gram].add(key)
+        self._by_length[len(normalized)].add(key)
+        self._by_text[normalized].add(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for gram in entry['grams']:
+            self._discard(self._postings, gram, key)
+        self._discard(self._by_length, entry['length'], key)
+        self._discard(self._by_text, entry['normalized'], key)
+
+    @staticmethod
+    def _discard(mapping: Dict, bucket, key: str) -> None:
+        keys = mapping.get(bucket)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del mapping[bucket]
+
+    @staticmethod
+    def _rank_key(entry: Dict) -> tuple:
+        """Ties go to correct, then more popular answers"""
+        answer = entry['answer']
+        return (bool(answer.get(AnswerFields.IS_CORRECT)), answer.get(AnswerFields.RESPONSE_COUNT, 0) or 0)
+
+    @staticmethod
+    def _result(entry: Dict, similarity: float) -> Dict:
+        answer = entry['answer']
+        return {
+            "answerId": answer.get(AnswerFields.ID) or answer.get(AnswerFields.ANSWER_ID),
+            "answer": answer.get(AnswerFields.ANSWER, ''),
+            "isCorrect": bool(answer.get(AnswerFields.IS_CORRECT, False)),
+            "rank": answer.get(AnswerFields.RANK, 0),
+            "score": answer.get(AnswerFields.SCORE, 0),
+            "similarity": round(similarity, 4)
+        }
+
+
+class AnswerMatchService:
+    """Keeps one AnswerMatchIndex per question, refreshed incrementally from the API.
+
+    A refresh syncs copies of the indexes and swaps the whole dict in at once, so published
+    indexes are never modified and lookups need no lock. Stale indexes are rebuilt on a
+    background thread while requests keep matching against the current ones.
+    """
+
+    def __init__(self, db_handler, similarity_threshold: float = None, refresh_seconds: int = None):
+        self.db = db_handler
+        self.similarity_threshold = (
+            similarity_threshold if similarity_threshold is not None else Config.SIMILARITY_THRESHOLD
+        )
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else Config.MATCH_INDEX_REFRESH_SECONDS
+        self.indexes = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()            # guards swapping in a new indexes dict
+        self._refresh_lock = threading.Lock()    # one refresh at a time
+        self._retry_at = 0.0                     # after a failed background refresh, wait before the next
+
+    def refresh(self, questions: List[Dict] = None) -> Dict:
+        """Sync every question's index with the current answers"""
+        with self._refresh_lock:
+            return self._refresh(questions)
+
+    def _refresh(self, questions: List[Dict] = None) -> Dict:
+        start = time.perf_counter()
+        if questions is None:
+            questions = self.db.fetch_all_questions()
+
+        stats = {"questions": 0, "added": 0, "updated": 0, "removed": 0}
+        current = self.indexes
+        indexes = {}
+        for question in questions:
+            question_id = QuestionFormatter.get_question_id(question)
+            if not question_id:
+                continue
+            previous = current.get(question_id)
+            index = previous.copy() if previous is not None else AnswerMatchIndex(self.similarity_threshold)
+            changes = index.sync(question.get(QuestionFields.ANSWERS) or [])
+            for key, count in changes.items():
+                stats[key] += count
+            indexes[question_id] = index
+            # Questions are also reachable by their Mongo _id
+            if question.get(QuestionFields.ID):
+                indexes[str(question[QuestionFields.ID])] = index
+        stats["questions"] = len({id(index) for index in indexes.values()})
+
+        with self._lock:
+            self.indexes = indexes
+            self.loaded_at = time.time()
+
+        logger.info(f"Answer match indexes refreshed in {time.perf_counter() - start:.3f}s: "
+                    f"{stats['added']} added, {stats['updated']} updated, {stats['removed']} removed")
+        return stats
+
+    def match(self, question_id: str, text: str) -> Dict:
+        """Best-matching known answer for a live answer; raises KeyError for unknown questions"""
+        self._ensure_fresh()
+
+        start = time.perf_counter()
+        index = self.indexes.get(str(question_id))    # a published dict is never modified, only replaced
+        if index is None:
+            raise KeyError(question_id)
+        best = index.match(text)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        if best is None:
+            return {"matched": False, "threshold": self.similarity_threshold, "elapsed_ms": elapsed_ms}
+        return {"matched": True, **best, "threshold": self.similarity_threshold, "elapsed_ms": elapsed_ms}
+
+    def _is_stale(self) -> bool:
+        return self.loaded_at is None or time.time() - self.loaded_at > self.refresh_seconds
+
+    def _ensure_fresh(self) -> None:
+        """Load on first use; afterwards stale indexes are rebuilt in the background while requests keep using them"""
+        if not self._is_stale():
+            return
+        if self.loaded_at is None:
+            # Nothing to serve yet: wait for the first load (or the one already in flight)
+            with self._refresh_lock:
+                if self._is_stale():
+                    self._refresh()
+            return
+        if time.time() >= self._retry_at and self._refresh_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, name="answer-match-refresh", daemon=True).start()
+
+    def _refresh_in_background(self) -> None:
+        """Runs holding _refresh_lock, which the request that started it acquired"""
+        try:
+            if self._is_stale():
+                self._refresh()
+        except Exception as e:
+            self._retry_at = time.time() + self.refresh_seconds
+            logger.error(f"❌ Background answer match refresh failed, keeping current indexes: {str(e)}")
+        finally:
+            self._refresh_lock.release()
@@ -0,0 +1,124 @@
+"""
+Compaction Service - Merges near-duplicate answer spellings back into the stored questions
+"""
+
+import json
+import logging
+import time
+from typing import List, Dict
+
+from config.settings import Config
+from constants import QuestionFields
+from services.similarity_service import SimilarityService
+from utils.data_formatters import QuestionFormatter
+
+logger = logging.getLogger('survey_analytics')
+
+
+class CompactionService:
+    """Shrinks oversized question documents by persisting merged answer clusters in batches"""
+
+    def __init__(self, db_handler, similarity_service: SimilarityService = None,
+                 min_bytes: int = None, batch_size: int = None):
+        self.db = db_handler
+        self.similarity_service = similarity_service or SimilarityService(db_handler)
+        self.min_bytes = min_bytes if min_bytes is not None else Config.COMPACTION_MIN_BYTES
+        self.batch_size = max(1, batch_size if batch_size is not None else Config.COMPACTION_BATCH_SIZE)
+
+    @staticmethod
+    def document_size(question: Dict) -> int:
+        """Bytes of the question as it is sent to and stored by the API"""
+        return len(json.dumps(QuestionFormatter.format_for_api(question), ensure_ascii=False).encode('utf-8'))
+
+    def compact(self, dry_run: bool = False) -> Dict:
+        """Merge answers of every question over the size threshold and write the smaller documents back"""
+        start_time = time.time()
+        report = self._create_empty_report(dry_run)
+
+        questions = self.db.fetch_all_questions()
+        report['questions_scanned'] = len(questions)
+
+        batch = []
+        self.similarity_service.question_processor.limited_questions = report['limited_questions']
+        for question in questions:
+            size_before = self.document_size(question)
+            report['bytes_scanned'] += size_before
+            if size_before < self.min_bytes or not question.get(QuestionFields.ANSWERS):
+                continue
+            report['questions_over_threshold'] += 1
+
+            answers_before = len(question[QuestionFields.ANSWERS])
+            question, duplicates_merged = self.similarity_service.process_question_similarity(question)
+            if not duplicates_merged:
+                continue
+
+            batch.append({
+                'question': question,
+                'bytes_before': size_before,
+                'bytes_after': self.document_size(question),
+                'answers_before': answers_before,
+                'answers_after': len(question[QuestionFields.ANSWERS])
+            })
+            if len(batch) >= self.batch_size:
+                self._flush(batch, report, dry_run)
+                batch = []
+
+        if batch:
+            self._flush(batch, report, dry_run)
+
+        cluster_store = self.similarity_service.cluster_store
+        if cluster_store is not None and not dry_run:
+            cluster_store.save()
+
+        report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+        report['processing_time'] = round(time.time() - start_time, 2)
+        logger.info(f"🗜️ Compaction {'(dry run) ' if dry_run else ''}finished: "
+                    f"{report['questions_compacted']} questions, {report['answers_removed']} answers removed, "
+                    f"{report['bytes_saved']} bytes saved")
+        return report
+
+    def _create_empty_report(self, dry_run: bool) -> Dict:
+        """Per-run compaction report with every counter at zero"""
+        return {
+            "dry_run": dry_run,
+            "min_bytes": self.min_bytes,
+            "questions_scanned": 0,
+            "questions_over_threshold": 0,
+            "questions_compacted": 0,
+            "answers_removed": 0,
+            "bytes_scanned": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "bytes_saved": 0,
+            "batches": 0,
+            "failed_count": 0,
+            "limited_questions": [],
+            "questions": []
+        }
+
+    def _flush(self, batch: List[Dict], report: Dict, dry_run: bool) -> None:
+        """Write one batch of compacted questions; only written questions count towards bytes saved"""
+        report['batches'] += 1
+        if dry_run:
+            written = len(batch)
+        else:
+            result = self.db.bulk_update_questions([item['question'] for item in batch])
+            written = result.get("updated") or result.get("updated_count", 0)
+            if written < len(batch):
+                # bulk_update_questions reports a count, not which ones failed
+                report['failed_count'] += len(batch) - written
+                logger.warning(f"⚠️ Compaction batch {report['batches']}: {written}/{len(batch)} questions updated")
+                return
+
+        for item in batch[:written]:
+            report['questions_compacted'] += 1
+            report['answers_removed'] += item['answers_before'] - item['answers_after']
+            report['bytes_before'] += item['bytes_before']
+            report['bytes_after'] += item['bytes_after']
+            report['questions'].append({
+                "questionId": QuestionFormatter.get_question_id(item['question']),
+                "answers_before": item['answers_before'],
+                "answers_after": item['answers_after'],
+                "bytes_before": item['bytes_before'],
+                "bytes_after": item['bytes_after']
+            })
@@ -8,6 +8,7 @@ from typing import List, Dict, Tuple
 from config.settings import Config
 from utils.api_handler import APIHandler
 from utils.data_formatters import QuestionFormatter
+from utils.schema_validator import question_validator
 from utils.response_processor import ResponseProcessor
 from constants import QuestionFields, AnswerFields, APIKeys
 
@@ -146,17 +147,16 @@ class QuestionValidator:
     def validate_question_for_final(question: Dict) -> Tuple[bool, str]:
         """Validate if question meets final endpoint requirements"""
         question_type = question.get(QuestionFields.QUESTION_TYPE, '').lower()
-        answers = question.get(QuestionFields.ANSWERS, [])
         
         # Only process Input questions
         if question_type != 'input':
             return False, f"Skipping {question_type} question - only Input questions are processed"
         
-        # Check for at least 3 correct answers
-        correct_answers = [a for a in answers if a.get(AnswerFields.IS_CORRECT, False)]
+        # Check for at least 3 correct answers (counted by the validation pass)
+        correct_answers = question_validator.validate(question)["correct_answers"]
         
-        if len(correct_answers) < 3:
-            return False, f"Input question needs at least 3 correct answers, found {len(correct_answers)}"
+        if correct_answers < 3:
+            return False, f"Input question needs at least 3 correct answers, found {correct_answers}"
         
         return True, "Valid Input question"
 
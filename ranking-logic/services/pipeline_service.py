@@ -0,0 +1,147 @@
+"""
+Pipeline Service - Similarity merging and ranking in one fetch/update cycle
+"""
+
+import logging
+import time
+from typing import List, Dict
+
+from constants import QuestionFields
+from services.ranking_service import RankingService
+from services.similarity_service import SimilarityService
+from utils.data_formatters import DataValidator
+
+logger = logging.getLogger('survey_analytics')
+
+
+class PipelineService:
+    """Fetches questions once, merges and ranks them in memory, then writes once"""
+
+    STAGES = ('fetch', 'merge', 'rank', 'validate', 'write')
+
+    def __init__(self, db_handler, similarity_service: SimilarityService = None,
+                 ranking_service: RankingService = None):
+        self.db = db_handler
+        self.similarity_service = similarity_service or SimilarityService(db_handler)
+        self.ranking_service = ranking_service or RankingService(db_handler)
+
+    def process_all_questions(self) -> Dict:
+        """Run merge + rank over all questions with a single fetch and a single bulk update"""
+        timings = {stage: 0.0 for stage in self.STAGES}
+        stats = self._create_empty_stats()
+
+        start = time.perf_counter()
+        questions = self.db.fetch_all_questions()
+        timings['fetch'] = time.perf_counter() - start
+        stats['total_questions'] = len(questions)
+
+        if not questions:
+            logger.warning("No questions found for pipeline processing")
+            return self._finish(stats, timings)
+
+        logger.info(f"Pipeline processing {len(questions)} questions")
+        changed = self._merge_questions(questions, stats, timings)
+        ranked = self._rank_questions(questions, stats, timings)
+        to_update = self._validate_questions(questions, changed, ranked, stats, timings)
+        self._write_questions(to_update, stats, timings)
+
+        return self._finish(stats, timings)
+
+    def _create_empty_stats(self) -> Dict:
+        """Combined similarity + ranking stats with every counter at zero"""
+        return {
+            "total_questions": 0,
+            "merged_questions": 0,
+            "duplicates_merged": 0,
+            "processed_count": 0,
+            "skipped_mcq": 0,
+            "skipped_insufficient": 0,
+            "validation_failed": 0,
+            "skipped_count": 0,
+            "answers_ranked": 0,
+            "answers_scored": 0,
+            "updated_count": 0,
+            "failed_count": 0,
+            "limited_questions": []
+        }
+
+    def _merge_questions(self, questions: List[Dict], stats: Dict, timings: Dict) -> set:
+        """Merge similar answers in place; returns indices of questions whose answers changed"""
+        start = time.perf_counter()
+        changed = set()
+        processor = self.similarity_service.question_processor
+        processor.limited_questions = []
+
+        for i, question in enumerate(questions):
+            if not question.get(QuestionFields.ANSWERS):
+                continue
+            _, duplicates_merged = processor.process_question_similarity(question)
+            if duplicates_merged:
+                changed.add(i)
+                stats['merged_questions'] += 1
+                stats['duplicates_merged'] += duplicates_merged
+
+        if self.similarity_service.cluster_store is not None:
+            self.similarity_service.cluster_store.save()
+        stats['limited_questions'] = processor.limited_questions
+
+        timings['merge'] = time.perf_counter() - start
+        return changed
+
+    def _rank_questions(self, questions: List[Dict], stats: Dict, timings: Dict) -> set:
+        """Rank merged answers in place; returns indices of questions that were ranked"""
+        start = time.perf_counter()
+        ranked = set()
+        processor = self.ranking_service.question_processor
+
+        for i, question in enumerate(questions):
+            questions[i], result = processor.process_question(question)
+            if result.get("processed"):
+                ranked.add(i)
+                stats['answers_ranked'] += int(result.get("ranked_cnt", 0))
+                stats['answers_scored'] += int(result.get("scored_cnt", 0))
+            else:
+                stats['skipped_mcq'] += int(result.get("skipped_mcq", False))
+                stats['skipped_insufficient'] += int(result.get("skipped_insufficient", False))
+
+        timings['rank'] = time.perf_counter() - start
+        return ranked
+
+    def _validate_questions(self, questions: List[Dict], changed: set, ranked: set,
+                            stats: Dict, timings: Dict) -> List[Dict]:
+        """Questions that were merged or ranked and pass validation; unchanged ones are not re-sent"""
+        start = time.perf_counter()
+        to_update = []
+
+        for i in sorted(changed | ranked):
+            if DataValidator.validate_question(questions[i]):
+                to_update.append(questions[i])
+                if i in ranked:
+                    stats['processed_count'] += 1
+            else:
+                stats['validation_failed'] += 1
+
+        timings['validate'] = time.perf_counter() - start
+        return to_update
+
+    def _write_questions(self, to_update: List[Dict], stats: Dict, timings: Dict) -> None:
+        """Single bulk update for every question the pipeline changed"""
+        start = time.perf_counter()
+
+        if to_update:
+            logger.info(f"Updating {len(to_update)} questions after merge + rank")
+            result = self.db.bulk_update_questions(to_update)
+            stats['updated_count'] = result.get("updated") or result.get("updated_count", 0)
+            stats['failed_count'] = len(to_update) - stats['updated_count']
+        else:
+            logger.info("No questions changed - nothing to update")
+
+        timings['write'] = time.perf_counter() - start
+
+    def _finish(self, stats: Dict, timings: Dict) -> Dict:
+        """Add derived counters and the per-stage timing breakdown"""
+        stats['skipped_count'] = stats['skipped_mcq'] + stats['skipped_insufficient'] + stats['validation_failed']
+        stats['failed_count'] += stats['validation_failed']
+        stats['timings'] = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        stats['timings']['total'] = round(sum(timings.values()), 3)
+        return stats
@@ -0,0 +1,189 @@
+"""
+Question Dedup Service - Finds near-duplicate questions with a sparse TF-IDF cosine index
+"""
+
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple
+
+from config.settings import Config
+from constants import AnswerFields, QuestionFields
+from utils.data_formatters import QuestionFormatter
+
+logger = logging.getLogger('survey_analytics')
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class QuestionTfidfIndex:
+    """Unit-length TF-IDF vectors of question texts and every pair whose cosine reaches the threshold"""
+
+    def __init__(self, texts: List[str], threshold: float):
+        self.threshold = threshold
+        self.vectors = []          # i -> {token: weight}, L2-normalized
+        self.candidates = 0
+        self._build(texts)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return TOKEN_PATTERN.findall((text or '').lower())
+
+    def _build(self, texts: List[str]) -> None:
+        """Sublinear tf, smoothed idf"""
+        counts = [Counter(self.tokenize(text)) for text in texts]
+        document_frequency = Counter(token for tokens in counts for token in tokens)
+        total = len(texts)
+        self.document_frequency = document_frequency
+
+        for tokens in counts:
+            weights = {
+                token: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequency[token])) + 1)
+                for token, count in tokens.items()
+            }
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            self.vectors.append({token: weight / norm for token, weight in weights.items()} if norm else {})
+
+    def similar_pairs(self, blocks: List[List[int]] = None) -> List[Tuple[int, int, float]]:
+        """(i, j, cosine) with i < j for every pair in the same block whose cosine reaches the threshold"""
+        if blocks is None:
+            blocks = [list(range(len(self.vectors)))]
+        pairs = []
+        for block in blocks:
+            pairs.extend(self._block_pairs(block))
+        return sorted(pairs)
+
+    def _block_pairs(self, block: List[int]) -> List[Tuple[int, int, float]]:
+        """All-pairs search: only the rarest tokens of each vector are indexed.
+
+        Tokens are visited from most to least common. A vector's leading tokens stay out of the
+        index while the sum of weight * (largest weight of that token in the block) is below the
+        threshold, because a pair sharing nothing else cannot reach it. Common words therefore
+        never produce candidates, and every candidate is verified with the full dot product.
+        """
+        max_weight = defaultdict(float)
+        for i in block:
+            for token, weight in self.vectors[i].items():
+                max_weight[token] = max(max_weight[token], weight)
+
+        def order(token):
+            return (-self.document_frequency[token], token)
+
+        postings = defaultdict(list)    # token -> indexed vector ids
+        pairs = []
+        for i in block:
+            vector = self.vectors[i]
+            if not vector:
+                continue
+
+            seen = set()
+            for token in vector:
+                for j in postings.get(token, ()):
+                    if j not in seen:
+                        seen.add(j)
+            self.candidates += len(seen)
+            for j in seen:
+                cosine = self._dot(vector, self.vectors[j])
+                if cosine >= self.threshold:
+                    pairs.append((min(i, j), max(i, j), round(cosine, 4)))
+
+            bound = 0.0
+            for token in sorted(vector, key=order):
+                bound += vector[token] * max_weight[token]
+                if bound >= self.threshold:
+                    postings[token].append(i)
+        return pairs
+
+    @staticmethod
+    def _dot(a: Dict[str, float], b: Dict[str, float]) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(weight * b.get(token, 0.0) for token, weight in a.items())
+
+
+class QuestionDedupService:
+    """Reports groups of near-duplicate questions so their responses can be combined"""
+
+    def __init__(self, db_handler=None, threshold: float = None):
+        self.db = db_handler
+        self.threshold = threshold if threshold is not None else Config.DUPLICATE_QUESTION_THRESHOLD
+
+    def find_duplicates(self, questions: List[Dict] = None, any_type: bool = False) -> Dict:
+        """Duplicate groups of questions; only questions of the same type are compared unless any_type"""
+        if questions is None:
+            questions = self.db.fetch_all_questions()
+        questions = [question for question in questions if (question.get(QuestionFields.QUESTION) or '').strip()]
+
+        index = QuestionTfidfIndex([question[QuestionFields.QUESTION] for question in questions], self.threshold)
+        blocks = defaultdict(list)
+        for i, question in enumerate(questions):
+            blocks['' if any_type else question.get(QuestionFields.QUESTION_TYPE, '')].append(i)
+        pairs = index.similar_pairs(list(blocks.values()))
+
+        groups = [self._describe_group(questions, members, pairs) for members in self._group(len(questions), pairs)]
+        groups.sort(key=lambda group: (-group['total_responses'], group['canonical']['questionId']))
+
+        logger.info(f"🔎 Near-duplicate questions: {len(groups)} groups from {len(pairs)} pairs "
+                    f"({index.candidates} candidates checked, {len(questions)} questions)")
+        return {
+            "threshold": self.threshold,
+            "questions_scanned": len(questions),
+            "candidates_checked": index.candidates,
+            "pairs": len(pairs),
+            "duplicate_questions": sum(len(group['questions']) - 1 for group in groups),
+            "groups": groups
+        }
+
+    @staticmethod
+    def _group(count: int, pairs: List[Tuple[int, int, float]]) -> List[List[int]]:
+        """Connected components of the similar-pair graph (union-find)"""
+        parent = list(range(count))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j, _ in pairs:
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        components = defaultdict(list)
+        for i in range(count):
+            components[find(i)].append(i)
+        return [members for members in components.values() if len(members) > 1]
+
+    @staticmethod
+    def _responses(question: Dict) -> int:
+        return sum(answer.get(AnswerFields.RESPONSE_COUNT, 0) or 0 for answer in question.get(QuestionFields.ANSWERS) or [])
+
+    def _describe_group(self, questions: List[Dict], members: List[int], pairs: List[Tuple[int, int, float]]) -> Dict:
+        """Group row; the question with the most responses is suggested as the one to keep"""
+        member_set = set(members)
+        rows = []
+        for i in members:
+            question = questions[i]
+            rows.append({
+                "questionId": QuestionFormatter.get_question_id(question),
+                "question": question.get(QuestionFields.QUESTION, ''),
+                "questionType": question.get(QuestionFields.QUESTION_TYPE, ''),
+                "questionCategory": question.get(QuestionFields.QUESTION_CATEGORY, ''),
+                "questionLevel": question.get(QuestionFields.QUESTION_LEVEL, ''),
+                "answers": len(question.get(QuestionFields.ANSWERS) or []),
+                "responses": self._responses(question)
+            })
+        rows.sort(key=lambda row: (-row['responses'], row['questionId']))
+
+        ids = {i: QuestionFormatter.get_question_id(questions[i]) for i in members}
+        return {
+            "canonical": rows[0],
+            "questions": rows,
+            "total_responses": sum(row['responses'] for row in rows),
+            "pairs": [
+                {"questionIds": [ids[i], ids[j]], "similarity": similarity}
+                for i, j, similarity in pairs if i in member_set
+            ]
+        }
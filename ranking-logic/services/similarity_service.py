@@ -3,10 +3,16 @@ Refactored Similarity Service - Clean and modular
 """
 
 import logging
-from typing import List, Dict, Tuple
+import random
+import time
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Tuple, Optional, Set
+import numpy as np
 from config.settings import Config
 from utils.data_formatters import QuestionFormatter
-from constants import AnswerFields, LogMessages
+from database.cluster_store import ClusterStateStore
+from constants import AnswerFields, QuestionFields, LogMessages, SimilarityModes
 
 logger = logging.getLogger('survey_analytics')
 
@@ -36,37 +42,234 @@ class SimilarityCalculator:
     @staticmethod
     def _calculate_levenshtein_similarity(s1: str, s2: str, len1: int, len2: int) -> float:
         """Calculate Levenshtein distance-based similarity"""
-        # Levenshtein distance calculation
-        matrix = [[0] * (len2 + 1) for _ in range(len1 + 1)]
-        
-        # Initialize matrix
-        for i in range(len1 + 1):
-            matrix[i][0] = i
-        for j in range(len2 + 1):
-            matrix[0][j] = j
-        
-        # Fill matrix
+        # Levenshtein distance, keeping only two rows of the matrix
+        previous = list(range(len2 + 1))
         for i in range(1, len1 + 1):
+            current = [i] + [0] * len2
             for j in range(1, len2 + 1):
                 cost = 0 if s1[i-1] == s2[j-1] else 1
-                matrix[i][j] = min(
-                    matrix[i-1][j] + 1,      # deletion
-                    matrix[i][j-1] + 1,      # insertion
-                    matrix[i-1][j-1] + cost  # substitution
+                current[j] = min(
+                    previous[j] + 1,         # deletion
+                    current[j-1] + 1,        # insertion
+                    previous[j-1] + cost     # substitution
                 )
+            previous = current
         
-        edit_distance = matrix[len1][len2]
+        edit_distance = previous[len2]
         max_length = max(len1, len2)
         similarity = 1 - (edit_distance / max_length)
         
         return max(0, similarity)
+    
+    @staticmethod
+    def is_similar(text1: str, text2: str, threshold: float) -> bool:
+        """Same decision as calculate_similarity(text1, text2) >= threshold, without the full matrix"""
+        if not text1 or not text2:
+            return 0.0 >= threshold
+        
+        s1 = text1.lower().strip()
+        s2 = text2.lower().strip()
+        
+        if s1 == s2:
+            return 1.0 >= threshold
+        
+        len1, len2 = len(s1), len(s2)
+        if len1 == 0 or len2 == 0:
+            return 0.0 >= threshold
+        
+        budget = SimilarityCalculator.distance_budget(max(len1, len2), threshold)
+        if budget < 0:
+            return False
+        
+        return SimilarityCalculator.bounded_levenshtein_distance(s1, s2, budget) <= budget
+    
+    @staticmethod
+    def distance_budget(max_length: int, threshold: float) -> int:
+        """Largest edit distance that still passes the threshold at this length (-1 if none does)"""
+        # Same float comparison as calculate_similarity, so boundary cases agree
+        budget = min(max_length, int((1 - threshold) * max_length) + 1)
+        while budget >= 0 and max(0, 1 - budget / max_length) < threshold:
+            budget -= 1
+        return budget
+    
+    @staticmethod
+    def bounded_levenshtein_distance(s1: str, s2: str, budget: int) -> int:
+        """Levenshtein distance if it is at most budget, otherwise budget + 1 (banded DP with early exit)"""
+        # A shared prefix or suffix never changes the distance
+        start = 0
+        while start < len(s1) and start < len(s2) and s1[start] == s2[start]:
+            start += 1
+        end1, end2 = len(s1), len(s2)
+        while end1 > start and end2 > start and s1[end1 - 1] == s2[end2 - 1]:
+            end1 -= 1
+            end2 -= 1
+        s1, s2 = s1[start:end1], s2[start:end2]
+        
+        len1, len2 = len(s1), len(s2)
+        over = budget + 1
+        if abs(len1 - len2) > budget:
+            return over
+        
+        previous = [j if j <= budget else over for j in range(len2 + 1)]
+        for i in range(1, len1 + 1):
+            current = [over] * (len2 + 1)
+            if i <= budget:
+                current[0] = i
+            row_min = current[0]
+            char1 = s1[i - 1]
+            
+            for j in range(max(1, i - budget), min(len2, i + budget) + 1):
+                cost = previous[j - 1] + (char1 != s2[j - 1])
+                if previous[j] + 1 < cost:
+                    cost = previous[j] + 1
+                if current[j - 1] + 1 < cost:
+                    cost = current[j - 1] + 1
+                if cost > over:
+                    cost = over
+                current[j] = cost
+                if cost < row_min:
+                    row_min = cost
+            
+            if row_min > budget:
+                return over
+            previous = current
+        
+        return min(previous[len2], over)
+
+
+class MinHashLSHIndex:
+    """Finds candidate similar answers with character-shingle MinHash signatures and LSH banding"""
+    
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 3, seed: int = 1):
+        if bands < 1 or num_perm % bands != 0:
+            raise ValueError("num_perm must be a positive multiple of bands")
+        
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        
+        # Multiply-shift hash family: (a * x + b) mod 2^64, keep the high 32 bits
+        rng = random.Random(seed)
+        self._a = np.array([rng.getrandbits(64) | 1 for _ in range(num_perm)], dtype=np.uint64)
+        self._b = np.array([rng.getrandbits(64) for _ in range(num_perm)], dtype=np.uint64)
+        
+        self._buckets = defaultdict(list)
+        self._band_keys = []
+    
+    def shingles(self, text: str) -> Set[str]:
+        """Character shingles of the normalized text (same normalization as SimilarityCalculator)"""
+        normalized = text.lower().strip()
+        if len(normalized) <= self.shingle_size:
+            return {normalized}
+        return {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+    
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the text's shingle set"""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in self.shingles(text)),
+            dtype=np.uint64
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+    
+    def build(self, texts: List[str]) -> 'MinHashLSHIndex':
+        """Index every text; texts sharing any band are candidates for each other"""
+        self._buckets.clear()
+        self._band_keys = []
+        
+        for index, text in enumerate(texts):
+            signature = self.signature(text or '')
+            keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+            for key in keys:
+                self._buckets[key].append(index)
+            self._band_keys.append(keys)
+        
+        return self
+    
+    def candidates(self, index: int) -> Set[int]:
+        """Indices that share at least one LSH band with the given text"""
+        found = set()
+        for key in self._band_keys[index]:
+            found.update(self._buckets[key])
+        found.discard(index)
+        return found
+
+
+class MergeGuardrails:
+    """Per-question limits on fuzzy comparison work; past a limit, answers are only merged when equal"""
+    
+    def __init__(self, max_answer_length: int = 0, cell_budget: int = 0, time_limit: float = 0):
+        self.max_answer_length = max_answer_length    # 0 disables each limit
+        self.cell_budget = cell_budget
+        self.time_limit = time_limit
+        self.start()
+    
+    def start(self) -> None:
+        """Reset counters for the next question"""
+        self.started = time.perf_counter()
+        self.cells = 0
+        self.comparisons = 0
+        self.fallback_comparisons = 0
+        self.long_answer_comparisons = 0
+        self.degraded = None
+    
+    def is_similar(self, text1: str, text2: str, threshold: float) -> bool:
+        """Fuzzy decision while within limits, otherwise the cheap fallback comparison"""
+        s1 = (text1 or '').lower().strip()
+        s2 = (text2 or '').lower().strip()
+        
+        if self.max_answer_length and max(len(s1), len(s2)) > self.max_answer_length:
+            self.long_answer_comparisons += 1
+            return self._fallback(s1, s2, threshold)
+        
+        if self.degraded is None and self.time_limit and time.perf_counter() - self.started > self.time_limit:
+            self.degraded = 'time_limit'
+        if self.degraded is not None:
+            return self._fallback(s1, s2, threshold)
+        
+        if self.cell_budget and s1 and s2 and s1 != s2:
+            # Banded DP cells: shorter text times band width
+            budget = SimilarityCalculator.distance_budget(max(len(s1), len(s2)), threshold)
+            cost = min(len(s1), len(s2)) * min(max(len(s1), len(s2)), 2 * max(budget, 0) + 1)
+            if self.cells + cost > self.cell_budget:
+                self.degraded = 'compute_budget'
+                return self._fallback(s1, s2, threshold)
+            self.cells += cost
+        
+        self.comparisons += 1
+        return SimilarityCalculator.is_similar(text1, text2, threshold)
+    
+    def _fallback(self, s1: str, s2: str, threshold: float) -> bool:
+        """Equality after collapsing whitespace - linear time, never merges different wording"""
+        self.fallback_comparisons += 1
+        if not s1 or not s2:
+            return 0.0 >= threshold
+        return ' '.join(s1.split()) == ' '.join(s2.split())
+    
+    def report(self) -> Optional[Dict]:
+        """What limited the last question, or None if every comparison was fuzzy"""
+        if self.degraded is None and not self.long_answer_comparisons:
+            return None
+        return {
+            "reason": self.degraded or 'answer_length',
+            "long_answer_comparisons": self.long_answer_comparisons,
+            "comparisons": self.comparisons,
+            "fallback_comparisons": self.fallback_comparisons,
+            "cells": self.cells,
+            "elapsed_seconds": round(time.perf_counter() - self.started, 3)
+        }
 
 
 class AnswerMerger:
     """Handles merging of similar answers"""
     
-    def __init__(self, similarity_threshold: float):
+    def __init__(self, similarity_threshold: float, similarity_mode: str = SimilarityModes.EXACT,
+                 minhash_params: Optional[Dict] = None, guardrails: Optional[MergeGuardrails] = None):
         self.similarity_threshold = similarity_threshold
+        self.similarity_mode = similarity_mode
+        self.minhash_params = minhash_params or {}
+        self.guardrails = guardrails
+        self.last_guardrail_report = None
         self.similarity_calculator = SimilarityCalculator()
     
     def merge_similar_answers(self, answers: List[Dict]) -> Tuple[List[Dict], int]:
@@ -77,6 +280,8 @@ class AnswerMerger:
         merged_answers = []
         processed_indices = set()
         duplicates_merged = 0
+        self._start_guardrails()
+        candidate_index = self._build_candidate_index(answers)
         
         for i, answer in enumerate(answers):
             if i in processed_indices:
@@ -87,7 +292,7 @@ class AnswerMerger:
             
             # Find similar answers to merge
             similar_answers = self._find_similar_answers(
-                answer, answers, i, processed_indices
+                answer, answers, i, processed_indices, candidate_index
             )
             
             if similar_answers:
@@ -97,8 +302,118 @@ class AnswerMerger:
             
             merged_answers.append(current_answer)
         
+        self._finish_guardrails()
         return merged_answers, duplicates_merged
     
+    def merge_incremental(self, answers: List[Dict], state: Optional[Dict]) -> Tuple[List[Dict], int, Dict]:
+        """Merge using stored clusters: answers the stored state already keeps apart are never compared"""
+        if not answers:
+            return [], 0, {"clusters": []}
+        
+        self._start_guardrails()
+        known = self._known_positions(answers, state)
+        
+        # Greedy rule of merge_similar_answers, in answer order: join the first cluster whose
+        # representative is similar, else start one. Stored representatives are pairwise
+        # dissimilar, so two known answers are never compared with each other.
+        clusters = []
+        groups = []
+        for position, answer in enumerate(answers):
+            is_known = position in known
+            text = answer.get(AnswerFields.ANSWER, '')
+            target = self._find_cluster(text, clusters, skip_known=is_known)
+            if target is None:
+                clusters.append({"representative": text, "members": [], "known": is_known})
+                groups.append([])
+                target = len(clusters) - 1
+            key = self.answer_key(answer)
+            if key not in clusters[target]["members"]:
+                clusters[target]["members"].append(key)
+            groups[target].append((position, answer))
+        
+        merged_answers = []
+        duplicates_merged = 0
+        for cluster, members in zip(clusters, groups):
+            current_answer = self._create_base_answer(members[0][1])
+            if len(members) > 1:
+                current_answer = self._merge_answers(current_answer, members[1:])
+                duplicates_merged += len(members) - 1
+            key = self.answer_key(current_answer)
+            if key not in cluster["members"]:
+                cluster["members"].append(key)
+            cluster["response_count"] = current_answer[AnswerFields.RESPONSE_COUNT]
+            merged_answers.append(current_answer)
+        
+        stored = self._stored_clusters(clusters, merged_answers)
+        self._finish_guardrails()
+        logger.debug(f"Incremental merge: {len(answers) - len(known)} of {len(answers)} answers compared, "
+                     f"{len(clusters)} clusters")
+        return merged_answers, duplicates_merged, {"clusters": stored}
+    
+    def _known_positions(self, answers: List[Dict], state: Optional[Dict]) -> Set[int]:
+        """Positions of answers that are the only live member of a stored cluster and still carry its representative"""
+        stored = (state or {}).get("clusters", [])
+        member_to_cluster = {key: idx for idx, cluster in enumerate(stored) for key in cluster["members"]}
+        live = defaultdict(list)
+        for position, answer in enumerate(answers):
+            idx = member_to_cluster.get(self.answer_key(answer))
+            if idx is not None:
+                live[idx].append(position)
+        return {
+            positions[0] for idx, positions in live.items()
+            if len(positions) == 1 and answers[positions[0]].get(AnswerFields.ANSWER, '') == stored[idx]["representative"]
+        }
+    
+    def _stored_clusters(self, clusters: List[Dict], merged_answers: List[Dict]) -> List[Dict]:
+        """Clusters to keep for the next run, each under the text its merged answer is written back with.
+        
+        Representatives stay pairwise dissimilar. A merge can hand a cluster another member's text;
+        that text is kept only if it is dissimilar to every kept representative, otherwise the cluster
+        is left out and its answer is compared again on the next run.
+        """
+        stored = []
+        changed = []
+        for cluster, answer in zip(clusters, merged_answers):
+            entry = {"representative": answer.get(AnswerFields.ANSWER, ''), "members": cluster["members"],
+                     "response_count": cluster["response_count"]}
+            (stored if entry["representative"] == cluster["representative"] else changed).append(entry)
+        for entry in changed:
+            if all(not self._is_similar(other["representative"], entry["representative"]) for other in stored):
+                stored.append(entry)
+        return stored
+    
+    def _find_cluster(self, text: str, clusters: List[Dict], skip_known: bool = False) -> Optional[int]:
+        """Index of the first cluster whose representative is similar to the text"""
+        for idx, cluster in enumerate(clusters):
+            if skip_known and cluster["known"]:
+                continue
+            if self._is_similar(cluster["representative"], text):
+                return idx
+        return None
+    
+    def _is_similar(self, text1: str, text2: str) -> bool:
+        """Threshold decision for one pair, within the guardrails when they are set"""
+        if self.guardrails is not None:
+            return self.guardrails.is_similar(text1, text2, self.similarity_threshold)
+        return self.similarity_calculator.is_similar(text1, text2, self.similarity_threshold)
+    
+    def _start_guardrails(self) -> None:
+        self.last_guardrail_report = None
+        if self.guardrails is not None:
+            self.guardrails.start()
+    
+    def _finish_guardrails(self) -> None:
+        if self.guardrails is not None:
+            self.last_guardrail_report = self.guardrails.report()
+    
+    @staticmethod
+    def answer_key(answer: Dict) -> str:
+        """Stable identity of an answer across runs: its id, or its normalized text if it has none"""
+        answer_id = answer.get(AnswerFields.ID) or answer.get(AnswerFields.ANSWER_ID)
+        if answer_id:
+            return str(answer_id)
+        return "text:" + (answer.get(AnswerFields.ANSWER) or '').lower().strip()
+    
     def _create_base_answer(self, answer: Dict) -> Dict:
         """Create base answer preserving existing rank and score data"""
         current_answer = {
@@ -114,21 +429,46 @@ class AnswerMerger:
         
         return current_answer
     
+    def _build_candidate_index(self, answers: List[Dict]) -> Optional[MinHashLSHIndex]:
+        """Build the LSH index in minhash mode; exact mode compares against every later answer"""
+        if self.similarity_mode != SimilarityModes.MINHASH:
+            return None
+        
+        return MinHashLSHIndex(**self.minhash_params).build(
+            [answer.get(AnswerFields.ANSWER, '') for answer in answers]
+        )
+    
     def _find_similar_answers(self, base_answer: Dict, all_answers: List[Dict], 
-                             base_index: int, processed_indices: set) -> List[Tuple[int, Dict]]:
+                             base_index: int, processed_indices: set,
+                             candidate_index: Optional[MinHashLSHIndex] = None) -> List[Tuple[int, Dict]]:
         """Find answers similar to the base answer"""
         similar_answers = []
         
-        for j, other_answer in enumerate(all_answers):
+        if candidate_index is None:
+            candidates = range(len(all_answers))
+        else:
+            # Same ascending order as exact mode, so merges resolve identically
+            candidates = sorted(candidate_index.candidates(base_index))
+        
+        for j in candidates:
+            other_answer = all_answers[j]
             if j <= base_index or j in processed_indices:
                 continue
             
-            similarity = self.similarity_calculator.calculate_similarity(
-                base_answer.get(AnswerFields.ANSWER, ''),
-                other_answer.get(AnswerFields.ANSWER, '')
-            )
+            if candidate_index is None and self.guardrails is None:
+                similarity = self.similarity_calculator.calculate_similarity(
+                    base_answer.get(AnswerFields.ANSWER, ''),
+                    other_answer.get(AnswerFields.ANSWER, '')
+                )
+                is_similar = similarity >= self.similarity_threshold
+            else:
+                # Same rule, stopping once the edit budget is spent
+                is_similar = self._is_similar(
+                    base_answer.get(AnswerFields.ANSWER, ''),
+                    other_answer.get(AnswerFields.ANSWER, '')
+                )
             
-            if similarity >= self.similarity_threshold:
+            if is_similar:
                 similar_answers.append((j, other_answer))
         
         return similar_answers
@@ -186,16 +526,35 @@ class AnswerMerger:
 class QuestionSimilarityProcessor:
     """Handles similarity processing for individual questions"""
     
-    def __init__(self, answer_merger: AnswerMerger):
+    def __init__(self, answer_merger: AnswerMerger, cluster_store: Optional[ClusterStateStore] = None):
         self.answer_merger = answer_merger
+        self.cluster_store = cluster_store
+        self.limited_questions = []
     
     def process_question_similarity(self, question: Dict) -> Tuple[Dict, int]:
         """Process similarity for a single question - SAFE FOR MULTIPLE RUNS"""
-        if not question.get(AnswerFields.ANSWERS):
+        if not question.get(QuestionFields.ANSWERS):
             return question, 0
         
-        merged_answers, duplicates_merged = self.answer_merger.merge_similar_answers(question[AnswerFields.ANSWERS])
-        question[AnswerFields.ANSWERS] = merged_answers
+        question_id = QuestionFormatter.get_question_id(question)
+        if self.cluster_store is not None and question_id:
+            merged_answers, duplicates_merged, state = self.answer_merger.merge_incremental(
+                question[QuestionFields.ANSWERS], self.cluster_store.get(question_id)
+            )
+            if self.answer_merger.last_guardrail_report is None:
+                self.cluster_store.put(question_id, state)
+            else:
+                # Degraded clusters are not kept, so the next run compares these answers properly
+                self.cluster_store.remove(question_id)
+        else:
+            merged_answers, duplicates_merged = self.answer_merger.merge_similar_answers(question[QuestionFields.ANSWERS])
+        question[QuestionFields.ANSWERS] = merged_answers
+        
+        report = self.answer_merger.last_guardrail_report
+        if report is not None:
+            self.limited_questions.append({"questionId": question_id, **report})
+            logger.warning(f"⚠️ Question {question_id} hit merge guardrail '{report['reason']}': "
+                           f"{report['fallback_comparisons']} comparisons fell back to exact matching")
         
         return question, duplicates_merged
 
@@ -206,8 +565,17 @@ class SimilarityService:
     def __init__(self, db_handler):
         self.db = db_handler
         self.similarity_threshold = Config.SIMILARITY_THRESHOLD
-        self.answer_merger = AnswerMerger(self.similarity_threshold)
-        self.question_processor = QuestionSimilarityProcessor(self.answer_merger)
+        self.answer_merger = AnswerMerger(
+            self.similarity_threshold,
+            similarity_mode=Config.SIMILARITY_MODE,
+            minhash_params=Config.get_minhash_params(),
+            guardrails=MergeGuardrails(**Config.get_merge_guardrails())
+        )
+        self.cluster_store = (
+            ClusterStateStore(Config.CLUSTER_STATE_PATH, self.similarity_threshold)
+            if Config.CLUSTER_STATE_PATH else None
+        )
+        self.question_processor = QuestionSimilarityProcessor(self.answer_merger, self.cluster_store)
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts using Levenshtein distance"""
@@ -235,6 +603,9 @@ class SimilarityService:
             processing_result = self._process_questions_for_similarity(questions)
             update_result = self._update_processed_questions(processing_result['processed_questions'])
             
+            if self.cluster_store is not None:
+                self.cluster_store.save()
+            
             return self._combine_results(processing_result, update_result, len(questions))
             
         except Exception as e:
@@ -258,7 +629,8 @@ class SimilarityService:
             "skipped_count": 0,
             "updated_count": 0,
             "failed_count": 0,
-            "duplicates_merged": 0
+            "duplicates_merged": 0,
+            "limited_questions": []
         }
     
     def _process_questions_for_similarity(self, questions: List[Dict]) -> Dict:
@@ -267,9 +639,10 @@ class SimilarityService:
         total_duplicates_merged = 0
         processed_count = 0
         skipped_count = 0
+        self.question_processor.limited_questions = []
         
         for question in questions:
-            if question.get(AnswerFields.ANSWERS):
+            if question.get(QuestionFields.ANSWERS):
                 processed_question, duplicates_merged = self.question_processor.process_question_similarity(question)
                 processed_questions.append(processed_question)
                 total_duplicates_merged += duplicates_merged
@@ -283,12 +656,15 @@ class SimilarityService:
         
         logger.info(f"Similarity processing complete: {processed_count} processed, {skipped_count} skipped")
         logger.info(f"Total duplicates merged: {total_duplicates_merged}")
+        if self.question_processor.limited_questions:
+            logger.warning(f"⚠️ {len(self.question_processor.limited_questions)} questions hit merge guardrails")
         
         return {
             'processed_questions': processed_questions,
             'processed_count': processed_count,
             'skipped_count': skipped_count,
-            'total_duplicates_merged': total_duplicates_merged
+            'total_duplicates_merged': total_duplicates_merged,
+            'limited_questions': self.question_processor.limited_questions
         }
     
     def _update_processed_questions(self, processed_questions: List[Dict]) -> Dict:
@@ -306,7 +682,9 @@ class SimilarityService:
             "total_questions": total_questions,
             "processed_count": processing_result['processed_count'],
             "skipped_count": processing_result['skipped_count'],
-            "updated_count": update_result["updated_count"],
-            "failed_count": update_result["failed_count"],
-            "duplicates_merged": processing_result['total_duplicates_merged']
+            # bulk_update_questions reports "updated"/"failed_chunks"
+            "updated_count": update_result.get("updated", update_result.get("updated_count", 0)),
+            "failed_count": update_result.get("failed_chunks", update_result.get("failed_count", 0)),
+            "duplicates_merged": processing_result['total_duplicates_merged'],
+            "limited_questions": processing_result['limited_questions']
         }
\ No newline at end of file
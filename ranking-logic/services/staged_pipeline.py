@@ -0,0 +1,211 @@
+"""
+Staged Pipeline - Merge + rank with each stage on its own thread, connected by bounded queues
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config.settings import Config
+from constants import QuestionFields
+from services.pipeline_service import PipelineService
+from utils.data_formatters import DataValidator
+
+logger = logging.getLogger('survey_analytics')
+
+_DONE = object()
+
+
+class Stage:
+    """One worker thread: takes items from inbox, passes what handler returns to outbox.
+
+    The handler returns an iterable of items to emit (empty to drop the item). ``flush`` runs
+    once after the last item for stages that batch. Time is split into busy (handler), starved
+    (waiting on an empty inbox) and blocked (waiting on a full outbox - backpressure).
+    """
+
+    def __init__(self, name: str, handler: Callable[[object], Iterable],
+                 flush: Optional[Callable[[], Iterable]] = None):
+        self.name = name
+        self.handler = handler
+        self.flush = flush
+        self.inbox = None
+        self.outbox = None
+        self.items_in = 0
+        self.items_out = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            waited = time.perf_counter()
+            item = self.inbox.get()
+            self.starved += time.perf_counter() - waited
+            if item is _DONE:
+                break
+            if self.error is not None:
+                continue    # keep draining so upstream never blocks on a dead stage
+            self.items_in += 1
+            self._call(self.handler, item)
+
+        if self.error is None and self.flush is not None:
+            self._call(self.flush)
+        self._emit(_DONE)
+
+    def _call(self, handler: Callable, *args) -> None:
+        started = time.perf_counter()
+        try:
+            results = list(handler(*args))
+        except Exception as e:
+            self.error = e
+            logger.error(f"❌ Pipeline stage '{self.name}' failed: {str(e)}")
+            return
+        finally:
+            self.busy += time.perf_counter() - started
+        for result in results:
+            self.items_out += 1
+            self._emit(result)
+
+    def _emit(self, item) -> None:
+        if self.outbox is None:
+            return
+        waited = time.perf_counter()
+        self.outbox.put(item)
+        self.blocked += time.perf_counter() - waited
+
+    def report(self, wall: float) -> Dict:
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy, 3),
+            "starved_seconds": round(self.starved, 3),
+            "blocked_seconds": round(self.blocked, 3),
+            "utilization": round(self.busy / wall, 3) if wall else 0.0
+        }
+
+
+class StagedPipelineService(PipelineService):
+    """Same results as PipelineService, but stages overlap: writes start while later questions are still ranked"""
+
+    STAGES = ('fetch', 'merge', 'rank', 'validate', 'write')
+
+    def __init__(self, db_handler, similarity_service=None, ranking_service=None,
+                 queue_size: int = None, write_chunk_size: int = None):
+        super().__init__(db_handler, similarity_service, ranking_service)
+        self.queue_size = max(1, queue_size if queue_size is not None else Config.PIPELINE_QUEUE_SIZE)
+        self.write_chunk_size = max(1, write_chunk_size if write_chunk_size is not None
+                                    else Config.BULK_UPDATE_CHUNK_SIZE)
+
+    def process_all_questions(self) -> Dict:
+        """Run fetch → merge → rank → validate → write concurrently"""
+        stats = self._create_empty_stats()
+        stats['write_chunks'] = 0
+        pending = []
+        similarity_processor = self.similarity_service.question_processor
+        ranking_processor = self.ranking_service.question_processor
+        similarity_processor.limited_questions = []
+        stats['limited_questions'] = similarity_processor.limited_questions
+
+        def fetch(_):
+            # Same ingestion as every other caller: compatibility processing, validation, local store refresh
+            questions = self.db.fetch_all_questions()
+            stats['total_questions'] = len(questions)
+            return questions
+
+        def merge(question):
+            changed = False
+            if question.get(QuestionFields.ANSWERS):
+                _, duplicates_merged = similarity_processor.process_question_similarity(question)
+                if duplicates_merged:
+                    changed = True
+                    stats['merged_questions'] += 1
+                    stats['duplicates_merged'] += duplicates_merged
+            return [(question, changed)]
+
+        def rank(item):
+            question, changed = item
+            question, result = ranking_processor.process_question(question)
+            ranked = bool(result.get("processed"))
+            if ranked:
+                stats['answers_ranked'] += int(result.get("ranked_cnt", 0))
+                stats['answers_scored'] += int(result.get("scored_cnt", 0))
+            else:
+                stats['skipped_mcq'] += int(result.get("skipped_mcq", False))
+                stats['skipped_insufficient'] += int(result.get("skipped_insufficient", False))
+            # Unchanged questions are not re-sent
+            return [(question, ranked)] if changed or ranked else []
+
+        def validate(item):
+            question, ranked = item
+            if not DataValidator.validate_question(question):
+                stats['validation_failed'] += 1
+                return []
+            if ranked:
+                stats['processed_count'] += 1
+            return [question]
+
+        def write(question):
+            pending.append(question)
+            if len(pending) >= self.write_chunk_size:
+                write_pending()
+            return []
+
+        def write_pending():
+            if not pending:
+                return []
+            result = self.db.bulk_update_questions(list(pending))
+            updated = result.get("updated") or result.get("updated_count", 0)
+            stats['updated_count'] += updated
+            stats['failed_count'] += len(pending) - updated
+            stats['write_chunks'] += 1
+            pending.clear()
+            return []
+
+        stages = [
+            Stage('fetch', fetch),
+            Stage('merge', merge),
+            Stage('rank', rank),
+            Stage('validate', validate),
+            Stage('write', write, flush=write_pending)
+        ]
+        wall = self._run_stages(stages)
+
+        if self.similarity_service.cluster_store is not None and all(stage.error is None for stage in stages):
+            self.similarity_service.cluster_store.save()
+
+        errors = [stage for stage in stages if stage.error is not None]
+        if errors:
+            raise RuntimeError(f"Pipeline stage '{errors[0].name}' failed: {errors[0].error}") from errors[0].error
+
+        if not stats['total_questions']:
+            logger.warning("No questions found for pipeline processing")
+
+        stats['utilization'] = {stage.name: stage.report(wall) for stage in stages}
+        logger.info("Stage utilization: " + ", ".join(
+            f"{stage.name} {stage.busy / wall:.0%}" if wall else stage.name for stage in stages))
+        timings = {stage.name: stage.busy for stage in stages}
+        result = self._finish(stats, timings)
+        # Stages overlap, so the run took wall-clock time, not the sum of stage times
+        result['timings']['total'] = round(wall, 3)
+        return result
+
+    def _run_stages(self, stages: List[Stage]) -> float:
+        """Wire stages with bounded queues, start them and wait for the last one; returns wall time"""
+        source = queue.Queue()
+        source.put(None)    # the fetch stage runs once
+        source.put(_DONE)
+        stages[0].inbox = source
+        for upstream, downstream in zip(stages, stages[1:]):
+            upstream.outbox = downstream.inbox = queue.Queue(maxsize=self.queue_size)
+
+        started = time.perf_counter()
+        for stage in stages:
+            stage.thread.start()
+        for stage in stages:
+            stage.thread.join()
+        return time.perf_counter() - started
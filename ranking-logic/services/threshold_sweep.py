@@ -0,0 +1,201 @@
+"""
+Threshold Sweep Service - Merge statistics for many similarity thresholds from one distance pass
+"""
+
+import logging
+from collections import defaultdict
+from typing import List, Dict
+
+from config.settings import Config
+from constants import AnswerFields, QuestionFields
+from services.similarity_service import AnswerMerger, SimilarityCalculator
+from utils.data_formatters import QuestionFormatter
+
+logger = logging.getLogger('survey_analytics')
+
+
+class PairwiseSimilarities:
+    """Every answer pair of one question whose similarity reaches the loosest swept threshold"""
+
+    def __init__(self, answers: List[Dict], min_threshold: float, max_answer_length: int = 0):
+        self.answers = answers
+        self.min_threshold = min_threshold
+        self.max_answer_length = max_answer_length    # MAX_FUZZY_ANSWER_LENGTH; 0 disables it
+        self.neighbors = [[] for _ in answers]    # i -> [(j, similarity)] for j > i, ascending j
+        self.comparisons = 0
+        self._compute()
+
+    def _compute(self) -> None:
+        """One bounded Levenshtein pass, pruned by length and by the loosest threshold's edit budget"""
+        texts = [(answer.get(AnswerFields.ANSWER) or '') for answer in self.answers]
+        normalized = [text.lower().strip() for text in texts]
+
+        # Visit pairs shortest-first: once the length gap alone exceeds the edit budget, no longer partner can pass
+        order = sorted(range(len(texts)), key=lambda i: len(normalized[i]))
+        for a, i in enumerate(order):
+            for j in order[a + 1:]:
+                longer = len(normalized[j])
+                if self.max_answer_length and longer > self.max_answer_length:
+                    break    # past the cap answers only merge on equality (below)
+                if longer and longer - len(normalized[i]) > SimilarityCalculator.distance_budget(longer, self.min_threshold):
+                    break
+                similarity = self._similarity(texts[i], texts[j], normalized[i], normalized[j])
+                if similarity is not None:
+                    low, high = min(i, j), max(i, j)
+                    self.neighbors[low].append((high, similarity))
+
+        if self.max_answer_length:
+            self._add_long_answer_pairs(texts, normalized)
+
+        for pairs in self.neighbors:
+            pairs.sort()
+
+    def _add_long_answer_pairs(self, texts: List[str], normalized: List[str]) -> None:
+        """Pairs with an answer over the cap: the same whitespace-insensitive equality MergeGuardrails falls back to"""
+        collapsed = [' '.join(text.split()) for text in normalized]
+        by_text = defaultdict(list)
+        empty = []
+        for i, text in enumerate(collapsed):
+            (by_text[text] if normalized[i] else empty).append(i)
+
+        for i in range(len(texts)):
+            if len(normalized[i]) <= self.max_answer_length:
+                continue
+            partners = [(j, 1.0) for j in by_text[collapsed[i]]]
+            if self.min_threshold <= 0:
+                partners += [(j, 0.0) for j in empty]
+            for j, similarity in partners:
+                # Pairs of two long answers are added once, from the lower index
+                if j == i or (len(normalized[j]) > self.max_answer_length and j < i):
+                    continue
+                self.neighbors[min(i, j)].append((max(i, j), similarity))
+
+    def _similarity(self, text1: str, text2: str, s1: str, s2: str):
+        """Exact calculate_similarity value if it reaches min_threshold, else None"""
+        if not text1 or not text2:
+            return 0.0 if self.min_threshold <= 0 else None
+        if s1 == s2:
+            return 1.0
+        max_length = max(len(s1), len(s2))
+        if min(len(s1), len(s2)) == 0:
+            return 0.0 if self.min_threshold <= 0 else None
+
+        budget = SimilarityCalculator.distance_budget(max_length, self.min_threshold)
+        if budget < 0:
+            return None
+        self.comparisons += 1
+        distance = SimilarityCalculator.bounded_levenshtein_distance(s1, s2, budget)
+        if distance > budget:
+            return None
+        return max(0, 1 - (distance / max_length))
+
+    def clusters(self, threshold: float) -> List[List[int]]:
+        """Greedy clusters exactly as merge_similar_answers forms them at this threshold"""
+        processed = set()
+        clusters = []
+        for i in range(len(self.answers)):
+            if i in processed:
+                continue
+            processed.add(i)
+            members = [i]
+            for j, similarity in self.neighbors[i]:
+                if similarity >= threshold and j not in processed:
+                    members.append(j)
+                    processed.add(j)
+            clusters.append(members)
+        return clusters
+
+
+class ThresholdSweepService:
+    """Computes pairwise distances once per question and reports merge results for each threshold"""
+
+    def __init__(self, db_handler=None, max_answer_length: int = None):
+        self.db = db_handler
+        self.max_answer_length = (
+            max_answer_length if max_answer_length is not None else Config.MAX_FUZZY_ANSWER_LENGTH
+        )
+
+    def sweep(self, thresholds: List[float], questions: List[Dict] = None) -> Dict:
+        """Merge stats per threshold; fetches questions when none are given"""
+        thresholds = sorted(set(float(t) for t in thresholds))
+        if not thresholds:
+            raise ValueError("At least one threshold is required")
+        if thresholds[0] < 0 or thresholds[-1] > 1:
+            raise ValueError("Thresholds must be between 0 and 1")
+
+        if questions is None:
+            questions = self.db.fetch_all_questions()
+
+        totals = {threshold: self._create_empty_stats(threshold) for threshold in thresholds}
+        per_question = []
+        comparisons = 0
+
+        for question in questions:
+            answers = question.get(QuestionFields.ANSWERS) or []
+            if not answers:
+                continue
+
+            pairs = PairwiseSimilarities(answers, thresholds[0], self.max_answer_length)
+            comparisons += pairs.comparisons
+            question_rows = []
+            for threshold in thresholds:
+                row = self._question_stats(answers, pairs.clusters(threshold), threshold)
+                self._accumulate(totals[threshold], row)
+                question_rows.append(row)
+
+            per_question.append({
+                "questionId": QuestionFormatter.get_question_id(question),
+                "answers": len(answers),
+                "thresholds": question_rows
+            })
+
+        logger.info(f"Threshold sweep: {len(per_question)} questions, {comparisons} distance computations")
+        return {
+            "thresholds": [totals[threshold] for threshold in thresholds],
+            "questions": per_question,
+            "distance_computations": comparisons
+        }
+
+    def _question_stats(self, answers: List[Dict], clusters: List[List[int]], threshold: float) -> Dict:
+        """Cluster and merged-response stats for one question at one threshold"""
+        merger = AnswerMerger(threshold)
+        merged_responses = 0
+        correct_clusters = 0
+
+        for members in clusters:
+            merged = merger._create_base_answer(answers[members[0]])
+            if len(members) > 1:
+                merged = merger._merge_answers(merged, [(j, answers[j]) for j in members[1:]])
+                merged_responses += sum(answers[j].get(AnswerFields.RESPONSE_COUNT, 0) for j in members[1:])
+            correct_clusters += 1 if merged.get(AnswerFields.IS_CORRECT) else 0
+
+        return {
+            "threshold": threshold,
+            "answers": len(answers),
+            "clusters": len(clusters),
+            "duplicates_merged": len(answers) - len(clusters),
+            "merged_responses": merged_responses,
+            "correct_clusters": correct_clusters,
+            "largest_cluster": max(len(members) for members in clusters)
+        }
+
+    def _create_empty_stats(self, threshold: float) -> Dict:
+        """Totals across questions for one threshold"""
+        return {
+            "threshold": threshold,
+            "questions_with_merges": 0,
+            "answers": 0,
+            "clusters": 0,
+            "duplicates_merged": 0,
+            "merged_responses": 0,
+            "correct_clusters": 0,
+            "largest_cluster": 0
+        }
+
+    def _accumulate(self, totals: Dict, row: Dict) -> None:
+        """Add one question's stats to the threshold totals"""
+        for key in ('answers', 'clusters', 'duplicates_merged', 'merged_responses', 'correct_clusters'):
+            totals[key] += row[key]
+        totals['largest_cluster'] = max(totals['largest_cluster'], row['largest_cluster'])
+        if row['duplicates_merged']:
+            totals['questions_with_merges'] += 1
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Threshold Sweep - Compare SIMILARITY_THRESHOLD candidates from a single distance pass
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict
+
+from config.settings import Config
+from database.db_handler import DatabaseHandler
+from services.threshold_sweep import ThresholdSweepService
+from utils.logger import setup_logger
+
+DEFAULT_THRESHOLDS = [0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95]
+
+
+def print_report(report: Dict, processing_time: float) -> None:
+    """Print one row of totals per threshold"""
+    print("\n" + "=" * 70)
+    print("📐 SIMILARITY THRESHOLD SWEEP")
+    print("=" * 70)
+    print(f"⏱️  Processing Time: {processing_time}s")
+    print(f"📝 Questions: {len(report['questions'])}")
+    print(f"🔢 Distance Computations: {report['distance_computations']}")
+    print()
+    print(f"{'threshold':>9} {'clusters':>9} {'merged':>8} {'responses':>10} {'questions':>10} {'largest':>8}")
+    for row in report['thresholds']:
+        current = " ◀ current" if row['threshold'] == Config.SIMILARITY_THRESHOLD else ""
+        print(f"{row['threshold']:>9} {row['clusters']:>9} {row['duplicates_merged']:>8} "
+              f"{row['merged_responses']:>10} {row['questions_with_merges']:>10} {row['largest_cluster']:>8}{current}")
+    print("=" * 70)
+
+
+def main() -> bool:
+    """Sweep thresholds over live questions or a saved JSON export"""
+    parser = argparse.ArgumentParser(description="Merge statistics for several similarity thresholds")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--input", help="JSON file with a list of questions (or {\"data\": [...]}) instead of the API")
+    parser.add_argument("--output", help="Write the full report, including per-question rows, to this JSON file")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    start_time = time.time()
+
+    try:
+        if args.input:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            questions = data.get('data', []) if isinstance(data, dict) else data
+            report = ThresholdSweepService().sweep(args.thresholds, questions)
+        else:
+            Config.validate()
+            report = ThresholdSweepService(DatabaseHandler()).sweep(args.thresholds)
+    except Exception as e:
+        logger.error(f"❌ Threshold sweep failed: {str(e)}")
+        return False
+
+    print_report(report, round(time.time() - start_time, 2))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Wrote sweep report to {args.output}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -1,5 +1,6 @@
 from typing import Dict, List
 from constants import QuestionFields, AnswerFields, Defaults
+from utils.schema_validator import question_validator
 
 
 def _to_bool(v) -> bool:
@@ -133,17 +134,5 @@ class DataValidator:
 
     @staticmethod
     def validate_question(question: Dict) -> bool:
-        qid = QuestionFormatter.get_question_id(question)
-        if not qid:
-            return False
-        if not question.get(QuestionFields.QUESTION_CATEGORY):
-            return False
-        if not question.get(QuestionFields.QUESTION_LEVEL):
-            return False
-        answers = question.get(QuestionFields.ANSWERS) or []
-        if not isinstance(answers, list) or not answers:
-            return False
-        for i, a in enumerate(answers):
-            if not DataValidator.validate_answer(a, qid, i):
-                return False
-        return True
\ No newline at end of file
+        # Compiled single-pass check
+        return question_validator.is_valid(question)
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Schema Validator - One compiled, single-pass validator for question records
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+from constants import AnswerFields, QuestionFields
+
+# Question schema: id (any of the listed fields), required non-empty fields, and the type of every answer field
+QUESTION_SCHEMA = {
+    "id": (QuestionFields.QUESTION_ID, QuestionFields.ID),
+    "required": (QuestionFields.QUESTION_CATEGORY, QuestionFields.QUESTION_LEVEL),
+    "answers": {
+        AnswerFields.ANSWER: str,
+        AnswerFields.IS_CORRECT: bool,
+        AnswerFields.RESPONSE_COUNT: int,
+        AnswerFields.RANK: int,
+        AnswerFields.SCORE: int
+    }
+}
+
+_TYPE_NAMES = {str: 'string', bool: 'boolean', int: 'integer'}
+
+
+class SchemaValidator:
+    """Validator compiled from a schema dict into a generated answer-checking function.
+
+    ``validate`` walks a question's answers once and returns a verdict dict::
+
+        {"valid": bool, "errors": [{"path", "error", "expected"}], "correct_answers": int}
+
+    Verdicts are not cached. Ranking edits answers in place, so a cache would have to be keyed
+    on the answers' content, and building that key costs more than the compiled check itself.
+    """
+
+    def __init__(self, schema: Dict):
+        self.id_fields = tuple(schema.get("id", ()))
+        self.required_fields = tuple(schema.get("required", ()))
+        answer_fields = schema.get("answers", {})
+        self.answer_fields = tuple(answer_fields)
+        self.answer_types = tuple(answer_fields.values())
+        self._check_answers = self._compile_answer_check(self.answer_fields, self.answer_types)
+
+    @staticmethod
+    def _compile_answer_check(fields: Tuple[str, ...], types: Tuple[type, ...]) -> Callable:
+        """Generate one function with every answer field check inlined.
+
+        It returns the number of correct answers, or None as soon as an answer fails, so valid
+        questions pay for one subscript and one isinstance per field and nothing else.
+        """
+        checks = " and ".join(f"isinstance(answer[{field!r}], t{i})" for i, field in enumerate(fields)) or "True"
+        count = (f"        if answer[{AnswerFields.IS_CORRECT!r}]:\n            correct += 1\n"
+                 if AnswerFields.IS_CORRECT in fields else "")
+        source = (
+            "def check_answers(answers):\n"
+            "    correct = 0\n"
+            "    for answer in answers:\n"
+            "        try:\n"
+            f"            if not ({checks}):\n"
+            "                return None\n"
+            "        except (KeyError, TypeError):\n"
+            "            return None\n"
+            f"{count}"
+            "    return correct\n"
+        )
+        namespace = {f"t{i}": expected for i, expected in enumerate(types)}
+        exec(compile(source, "<schema_validator>", "exec"), namespace)
+        return namespace["check_answers"]
+
+    def validate(self, question: Dict) -> Dict:
+        """Verdict for the question as it is now"""
+        return self._check(question, question.get(QuestionFields.ANSWERS))
+
+    def is_valid(self, question: Dict) -> bool:
+        return self.validate(question)["valid"]
+
+    def validate_many(self, questions: List[Dict]) -> Dict:
+        """Batch mode: verdicts for many questions, with the invalid ones' errors keyed by question id"""
+        validate = self.validate
+        valid_count = 0
+        errors = {}
+        for i, question in enumerate(questions):
+            verdict = validate(question)
+            if verdict["valid"]:
+                valid_count += 1
+            else:
+                errors[self._question_id(question) or f"#{i}"] = verdict["errors"]
+        return {
+            "total": len(questions),
+            "valid": valid_count,
+            "invalid": len(questions) - valid_count,
+            "errors": errors
+        }
+
+    def _question_id(self, question: Dict) -> str:
+        for field in self.id_fields:
+            value = question.get(field)
+            if value:
+                return value
+        return ""
+
+    def _check(self, question: Dict, answers) -> Dict:
+        """Single pass over the question and its answers"""
+        errors = []
+        if self.id_fields and not self._question_id(question):
+            errors.append({"path": self.id_fields[0], "error": "missing", "expected": "non-empty id"})
+        for field in self.required_fields:
+            if not question.get(field):
+                errors.append({"path": field, "error": "missing", "expected": "non-empty value"})
+
+        if not isinstance(answers, list) or not answers:
+            errors.append({"path": QuestionFields.ANSWERS, "error": "missing", "expected": "non-empty list"})
+            answers = answers if isinstance(answers, list) else []
+
+        correct = self._check_answers(answers)
+        if correct is None:
+            # Some answer failed: walk them again, this time naming every bad field
+            correct = 0
+            for i, answer in enumerate(answers):
+                errors.extend(self._answer_errors(i, answer))
+                if isinstance(answer, dict) and answer.get(AnswerFields.IS_CORRECT):
+                    correct += 1
+
+        return {"valid": not errors, "errors": errors, "correct_answers": correct}
+
+    def _answer_errors(self, index: int, answer) -> List[Dict]:
+        """Slow path, only for answers that failed the fast check: name every bad field"""
+        path = f"{QuestionFields.ANSWERS}[{index}]"
+        if not isinstance(answer, dict):
+            return [{"path": path, "error": "type", "expected": "object"}]
+        errors = []
+        for field, expected in zip(self.answer_fields, self.answer_types):
+            if field not in answer:
+                errors.append({"path": f"{path}.{field}", "error": "missing", "expected": _TYPE_NAMES.get(expected, expected.__name__)})
+            elif not isinstance(answer[field], expected):
+                errors.append({"path": f"{path}.{field}", "error": "type", "expected": _TYPE_NAMES.get(expected, expected.__name__)})
+        return errors
+
+
+question_validator = SchemaValidator(QUESTION_SCHEMA)